@@ -0,0 +1,262 @@
+"""
+後台 API 的基準 / 壓力測試：在暫存的 SQLite 建立合成世界，透過 ASGI 直接呼叫
+routers/ 下的每個路由（不經網路），以多個並行 client 量測每個端點的
+throughput、p50 / p95 / p99 延遲與每次請求的 SQL 次數。
+
+SQL 次數取自 ProfilingMiddleware 的統計（util.metrics），因此需要 PROFILING=true。
+
+用法：
+    python -m benchmarks.bench_api --requests 200 --concurrency 8
+    python -m benchmarks.bench_api --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_api --baseline benchmarks/baseline.json --threshold 0.25
+
+提供 --baseline 時，任一端點 p95 變慢或 throughput 下降超過 threshold、平均 SQL 次數
+增加，或出現非預期的狀態碼，程式會以 exit code 1 結束。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.world import World, WorldConfig
+
+Request = Tuple[str, Optional[dict]]
+
+
+@dataclass
+class Scenario:
+    method: str
+    route: str                                   # 路由樣板，與 /metrics 的 route label 相同
+    build: Callable[[random.Random, World], Request]
+    expect: Tuple[int, ...] = (200,)
+    write: bool = False
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.route}"
+
+
+@dataclass
+class Result:
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    queries: float
+
+
+def _pick(rng: random.Random, ids: List[int]) -> int:
+    return ids[rng.randrange(len(ids))]
+
+
+def build_scenarios() -> List[Scenario]:
+    def get(route: str, build, **kwargs) -> Scenario:
+        return Scenario("GET", route, build, **kwargs)
+
+    return [
+        # maps
+        get("/maps/", lambda r, w: ("/maps/?limit=20", None)),
+        get("/maps/{map_id}", lambda r, w: (f"/maps/{_pick(r, w.map_ids)}", None)),
+        get("/maps/graph", lambda r, w: ("/maps/graph", None)),
+        get("/maps/path", lambda r, w: (f"/maps/path?from_id={_pick(r, w.map_ids)}&to_id={_pick(r, w.map_ids)}&level=30", None)),
+        get("/maps/{map_id}/reachable", lambda r, w: (f"/maps/{_pick(r, w.map_ids)}/reachable?level=10", None)),
+        get("/maps/{map_id}/events/sample", lambda r, w: (f"/maps/{_pick(r, w.map_ids)}/events/sample?n=1000", None)),
+        Scenario("PATCH", "/maps/{map_id}", lambda r, w: (f"/maps/{w.map_ids[0]}", {"description": "benchmark"}), write=True),
+        Scenario("PATCH", "/maps/{map_id}/events", lambda r, w: (
+            f"/maps/{w.map_ids[0]}/events", {"upsert": [{"event_id": w.event_ids[0], "probability": 0.1}]}), write=True),
+        Scenario("PATCH", "/maps/events", lambda r, w: ("/maps/events", {"maps": [
+            {"map_id": m, "upsert": [{"event_id": _pick(r, w.event_ids), "probability": 0.1}], "normalize": True}
+            for m in w.map_ids[:100]]}), write=True),
+        Scenario("PATCH", "/maps/connections", lambda r, w: ("/maps/connections", {"connections": [
+            {"map_a_id": a, "map_b_id": b, "is_locked": r.random() < 0.2}
+            for a, b in zip(w.map_ids[:100], w.map_ids[1:101])]}), write=True),
+        # items
+        get("/item/list_items", lambda r, w: ("/item/list_items?limit=50", None)),
+        get("/item/search", lambda r, w: (f"/item/search?q={r.choice(('iron', 'sword', 'ancient herb'))}&min_rarity=2&sort=price", None)),
+        get("/item/batch", lambda r, w: ("/item/batch?ids=" + ",".join(str(_pick(r, w.item_ids)) for _ in range(100)), None)),
+        get("/item/{item_id}", lambda r, w: (f"/item/{_pick(r, w.item_ids)}", None)),
+        get("/item/item_detail/{item_id}", lambda r, w: (f"/item/item_detail/{_pick(r, w.item_ids)}", None)),
+        # monsters / rewards
+        get("/monster/list_monster", lambda r, w: ("/monster/list_monster?limit=50", None)),
+        get("/monster/search", lambda r, w: ("/monster/search?q=monster&min_hp=100&max_hp=3000", None)),
+        get("/monster/ListAllMonsters", lambda r, w: ("/monster/ListAllMonsters?fields=id&fields=name&fields=hp", None)),
+        get("/monster/{monster_id}", lambda r, w: (f"/monster/{_pick(r, w.monster_ids)}", None)),
+        get("/monster/monster_detail/{monster_id}", lambda r, w: (f"/monster/monster_detail/{_pick(r, w.monster_ids)}", None)),
+        get("/monster_reward/rewards/{monster_id}", lambda r, w: (f"/monster_reward/rewards/{_pick(r, w.monster_ids)}", None)),
+        Scenario("POST", "/monster_reward/simulate", lambda r, w: (
+            "/monster_reward/simulate", {"monster_ids": r.sample(w.monster_ids, min(10, len(w.monster_ids))), "kills": 10000})),
+        Scenario("PUT", "/monster_reward/probability", lambda r, w: (
+            "/monster_reward/probability",
+            {"monster_id": w.drops[0][0], "item_id": w.drops[0][1], "probability": 0.25}), write=True),
+        # events
+        get("/event/list-event", lambda r, w: ("/event/list-event?limit=50", None)),
+        get("/event/search", lambda r, w: ("/event/search?q=event&event_type=battle", None)),
+        get("/event/{event_id}", lambda r, w: (f"/event/{_pick(r, w.event_ids)}", None)),
+        get("/event/detail/{event_id}", lambda r, w: (f"/event/detail/{_pick(r, w.event_ids)}", None)),
+        get("/event/result/{event_result_id}", lambda r, w: (f"/event/result/{_pick(r, w.result_ids)}", None)),
+        Scenario("POST", "/event/{event_id}/simulate", lambda r, w: (
+            f"/event/{_pick(r, w.event_ids)}/simulate", {"players": [{"attributes": {"level": 10}, "count": 1000}]})),
+        # users / auth
+        get("/user/list_user", lambda r, w: ("/user/list_user?limit=100", None)),
+        get("/user/get_all_user", lambda r, w: ("/user/get_all_user", None)),
+        get("/user/export_user", lambda r, w: ("/user/export_user", None)),
+        # 不存在的帳號：量測登入流程（執行緒池 + DB 查詢）本身
+        Scenario("POST", "/auth/login", lambda r, w: (
+            "/auth/login", {"username": f"nobody{r.randrange(10 ** 9)}", "password": "x"}), expect=(401,)),
+    ]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+async def run_scenario(client, scenario: Scenario, world: World, requests: int, concurrency: int,
+                       warmup: int, seed: int) -> Result:
+    from util.metrics import metrics
+
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        url, body = scenario.build(rng, world)
+        await client.request(scenario.method, url, json=body)
+    metrics.reset()
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            url, body = scenario.build(rng, world)
+            start = time.perf_counter()
+            response = await client.request(scenario.method, url, json=body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code not in scenario.expect:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    hist = metrics.query_counts.get((scenario.method, scenario.route))
+    latencies.sort()
+    return Result(
+        requests=len(latencies),
+        errors=errors,
+        rps=len(latencies) / elapsed if elapsed else 0.0,
+        p50_ms=percentile(latencies, 0.50),
+        p95_ms=percentile(latencies, 0.95),
+        p99_ms=percentile(latencies, 0.99),
+        queries=hist.sum / hist.count if hist and hist.count else 0.0,
+    )
+
+
+def compare(results: Dict[str, Result], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    failures = []
+    for name, result in results.items():
+        if result.errors:
+            failures.append(f"{name}: {result.errors} unexpected status codes")
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result.p95_ms > base["p95_ms"] * (1 + threshold):
+            failures.append(f"{name}: p95 {base['p95_ms']:.2f} -> {result.p95_ms:.2f} ms")
+        if result.rps < base["rps"] * (1 - threshold):
+            failures.append(f"{name}: throughput {base['rps']:.1f} -> {result.rps:.1f} req/s")
+        # SQL 次數是決定性的，增加即視為退步
+        if result.queries > base["queries"] + 0.5:
+            failures.append(f"{name}: queries/request {base['queries']:.1f} -> {result.queries:.1f}")
+    return failures
+
+
+def prepare_app(db_path: str, config: WorldConfig):
+    # 必須在匯入 main 之前設定，讓 engine 指向暫存資料庫
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["INIT_DB"] = "true"
+    os.environ["PROFILING"] = "true"
+    import logging
+    import main
+    from benchmarks.world import seed_world
+    from core_system.models.database import SessionLocal
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with SessionLocal() as db:
+        world = seed_world(db, config)
+    return main.app, world
+
+
+async def run(args) -> int:
+    import httpx
+
+    config = WorldConfig(maps=args.maps, events=args.events, items=args.items,
+                         monsters=args.monsters, users=args.users, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        app, world = prepare_app(os.path.join(tmp, "bench.db"), config)
+        print(f"seeded world in {time.perf_counter() - started:.1f}s: {asdict(config)}")
+
+        scenarios = [s for s in build_scenarios()
+                     if (args.writes or not s.write) and (not args.only or any(o in s.name for o in args.only))]
+        results: Dict[str, Result] = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            print(f"{'endpoint':<48} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>7}")
+            for i, scenario in enumerate(scenarios):
+                result = await run_scenario(client, scenario, world, args.requests, args.concurrency,
+                                            args.warmup, args.seed + i)
+                results[scenario.name] = result
+                print(f"{scenario.name:<48} {result.rps:>9.1f} {result.p50_ms:>8.2f} {result.p95_ms:>8.2f} "
+                      f"{result.p99_ms:>8.2f} {result.queries:>8.1f} {result.errors:>7}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({name: asdict(r) for name, r in results.items()}, f, indent=2, ensure_ascii=False)
+        print(f"baseline saved to {args.save_baseline}")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    failures = compare(results, baseline, args.threshold)
+    if failures:
+        print("\nREGRESSIONS:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="每個端點的請求數")
+    parser.add_argument("--concurrency", type=int, default=8, help="並行 client 數")
+    parser.add_argument("--warmup", type=int, default=10, help="每個端點不計入統計的暖機請求數")
+    parser.add_argument("--maps", type=int, default=200)
+    parser.add_argument("--events", type=int, default=100)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--monsters", type=int, default=300)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="*", help="只執行名稱包含這些字串的端點")
+    parser.add_argument("--no-writes", dest="writes", action="store_false", help="略過寫入類端點")
+    parser.add_argument("--baseline", help="比較用的 baseline JSON")
+    parser.add_argument("--save-baseline", help="將本次結果存成 baseline JSON")
+    parser.add_argument("--threshold", type=float, default=0.25, help="允許的退步比例")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+比較回應序列化與壓縮的前後差異（不需要資料庫）。
+
+以合成的地圖詳細資料（MapOut 結構）與 reward pool 列表為 payload，量測：
+- 標準 json（FastAPI 預設 JSONResponse）與 orjson（ORJSONResponse）的序列化時間
+- identity / gzip / br 的位元組數、壓縮時間，以及在指定頻寬下的預估傳輸時間
+
+用法：
+    python -m benchmarks.bench_response_encoding --neighbors 50 --events 80 --bandwidth-mbps 10
+"""
+import argparse
+import json
+import time
+
+import orjson
+
+from util.compression_middleware import compress_body
+
+
+def build_map_payload(neighbors: int, events: int) -> dict:
+    return {
+        "id": 1,
+        "name": "遺忘之森",
+        "description": "被迷霧遮蔽的古樹林" * 4,
+        "image_url": "https://example.com/maps/1.png",
+        "neighbors": [
+            {
+                "id": i,
+                "name": f"鄰近地圖 {i}",
+                "is_locked": i % 3 == 0,
+                "required_item": "靈魂之鑰" if i % 3 == 0 else None,
+                "required_level": i % 10,
+            }
+            for i in range(2, neighbors + 2)
+        ],
+        "events": [
+            {"event_id": i, "event_name": f"事件 {i}", "probability": round(1 / events, 6)}
+            for i in range(1, events + 1)
+        ],
+    }
+
+
+def build_reward_payload(items: int) -> dict:
+    return {
+        "monster_id": 1,
+        "monster_name": "史萊姆",
+        "drop_pool": [
+            {"drop_id": i, "item_id": i, "item_name": f"道具 {i}", "probability": 0.05}
+            for i in range(1, items + 1)
+        ],
+    }
+
+
+def timed(fn, repeat: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def report(name: str, payload: dict, repeat: int, bandwidth_mbps: float) -> None:
+    stdlib_body, stdlib_ms = timed(
+        lambda: json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), repeat)
+    orjson_body, orjson_ms = timed(lambda: orjson.dumps(payload), repeat)
+
+    print(f"\n== {name}")
+    print(f"serialize  json   {stdlib_ms:8.3f} ms  {len(stdlib_body):>9} B")
+    print(f"serialize  orjson {orjson_ms:8.3f} ms  {len(orjson_body):>9} B  ({stdlib_ms / orjson_ms:.1f}x faster)")
+
+    bytes_per_ms = bandwidth_mbps * 1_000_000 / 8 / 1000
+    print(f"{'encoding':<10} {'bytes':>9} {'compress ms':>12} {'transfer ms':>12} {'total ms':>10}")
+    for encoding in ("identity", "gzip", "br"):
+        if encoding == "identity":
+            body, compress_ms = orjson_body, 0.0
+        else:
+            body, compress_ms = timed(lambda: compress_body(orjson_body, encoding), repeat)
+        transfer_ms = len(body) / bytes_per_ms
+        print(f"{encoding:<10} {len(body):>9} {compress_ms:>12.3f} {transfer_ms:>12.2f} {compress_ms + transfer_ms:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--neighbors", type=int, default=50)
+    parser.add_argument("--events", type=int, default=80)
+    parser.add_argument("--reward-items", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--bandwidth-mbps", type=float, default=10.0, help="模擬 VPN 頻寬")
+    args = parser.parse_args()
+
+    report("map detail", build_map_payload(args.neighbors, args.events), args.repeat, args.bandwidth_mbps)
+    report("reward pool", build_reward_payload(args.reward_items), args.repeat, args.bandwidth_mbps)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,78 @@
+import os
+from contextlib import contextmanager
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.concurrency import run_in_threadpool
+
 from core_system.models.database import SessionLocal
+from util.db_engine import apply_sqlite_pragmas, engine_kwargs, get_engine
+from util.metrics import instrument_engine
+
+# 設為 true 時，唯讀的列表 API 改用 AsyncSession，等待 DB 時不佔用 threadpool
+ASYNC_DB_ENABLED = os.getenv("ASYNC_DB", "false").lower() == "true"
+
+# 同步 driver → 對應的 async driver
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+_async_sessionmaker = None
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+@contextmanager
+def session_scope():
+    """
+    給 StreamingResponse 的 generator 使用的 session。
+    get_db 的 session 會在回應開始串流前就關閉，串流時必須自行開啟。
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """
+    依同步 engine 的 URL 建立對應的 async engine（延遲建立，只建立一次），
+    連線池與 SQLite PRAGMA 設定與同步 engine 相同。
+    """
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        url = make_url(os.getenv("ASYNC_DATABASE_URL") or get_engine().url)
+        backend = url.get_backend_name()
+        if not os.getenv("ASYNC_DATABASE_URL"):
+            if backend not in ASYNC_DRIVERS:
+                raise RuntimeError(f"No async driver configured for {backend}")
+            url = url.set(drivername=ASYNC_DRIVERS[backend])
+        async_engine = create_async_engine(url, **engine_kwargs(url))
+        apply_sqlite_pragmas(async_engine.sync_engine)
+        instrument_engine(async_engine.sync_engine)
+        _async_sessionmaker = async_sessionmaker(async_engine, expire_on_commit=False)
+    return _async_sessionmaker
+
+
+async def get_read_db():
+    """
+    唯讀 API 使用的 session：ASYNC_DB=true 時為 AsyncSession，否則為一般 Session
+    （查詢透過 services.async_query.execute 丟到 threadpool 執行）。
+    """
+    if ASYNC_DB_ENABLED:
+        async with get_async_sessionmaker()() as session:
+            yield session
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
@@ -1,24 +1,40 @@
 # app/dependencies/user.py
 
+import os
+import time
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
-from core_system.models.database import SessionLocal
 from core_system.models.bo_admin import Admin  # 假設你的 User 模型是這個名稱
+from dependencies.db import get_db
+from util.cache import TTLCache
 SECRET_KEY = "your_secret_key"  # 替換為安全密鑰
 ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="user/login")  # 根據你的登入 endpoint 調整
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# 已驗證 token → Admin（detached）。到期時間取 TTL 與 token exp 較早者
+token_cache = TTLCache(
+    maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("TOKEN_CACHE_TTL", "300")),
+)
+
+
+def invalidate_admin_tokens(admin_id: int = None) -> None:
+    """Admin 資料變更或刪除後呼叫；不帶 admin_id 時清除全部快取。"""
+    if admin_id is None:
+        token_cache.clear()
+    else:
+        token_cache.delete_where(lambda _, admin: admin.id == admin_id)
+
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Admin:
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -36,4 +52,9 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     if user is None:
         raise credentials_exception
 
+    # 從 session 分離，讓快取的物件可以跨 request 使用
+    db.expunge(user)
+    exp = payload.get("exp")
+    ttl = token_cache.ttl if exp is None else min(token_cache.ttl, exp - time.time())
+    token_cache.set(token, user, ttl=ttl)
     return user
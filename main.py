@@ -1,14 +1,23 @@
 import os
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
-from core_system.models.database import Base, engine
+# 必須在匯入 core_system 與 routers 前載入，讓 DB 相關的環境變數生效
+load_dotenv()
+
+from core_system.models.database import Base
+from util.db_engine import get_engine
+from util.compression_middleware import CompressionMiddleware
+from util.etag_middleware import ETagMiddleware
+from util.metrics import instrument_engine
+from util.profiling_middleware import ProfilingMiddleware
+from services.search_service import ensure_search_indexes
 from routers import loginO
 from routers import userO
-from routers import monsterO, itemO, monsterRewardO, eventO, mapO
+from routers import monsterO, itemO, monsterRewardO, eventO, mapO, metricsO
 import logging
-load_dotenv()
 # 設定 root logger
 logging.basicConfig(
     level=logging.DEBUG,
@@ -17,7 +26,8 @@ logging.basicConfig(
 
 app = FastAPI(title="Modular FastAPI Project",
               openapi_version="3.1.0",
-              root_path="/bo_api")
+              root_path="/bo_api",
+              default_response_class=ORJSONResponse)
 origins = os.getenv("CORS_ORIGINS", "*").split(",")
 
 app.add_middleware(
@@ -28,8 +38,23 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],              # 允許所有 headers
 )
+# 依 Accept-Encoding 壓縮回應（br / gzip）
+app.add_middleware(CompressionMiddleware)
+# GET 回應加上 ETag，If-None-Match 命中時回 304
+# 放在壓縮外層：ETag 以實際送出的位元組計算，不同編碼自然有不同 ETag
+app.add_middleware(ETagMiddleware)
+# 最外層：記錄每個路由的延遲與 SQL 次數 / 耗時，供 /metrics 輸出
+PROFILING_ENABLED = os.getenv("PROFILING", "true").lower() == "true"
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+engine = get_engine()
+if PROFILING_ENABLED:
+    instrument_engine(engine)
 if os.getenv("INIT_DB", "false").lower() == "true":
     Base.metadata.create_all(bind=engine)
+# 搜尋用的 B-tree 索引與 FTS5 全文索引（已存在時略過）
+if os.getenv("SEARCH_INDEXES", "true").lower() == "true":
+    ensure_search_indexes(engine)
 # 將不同路由模組註冊到主應用
 app.include_router(router=loginO.router, prefix="/auth")
 app.include_router(router=userO.router, prefix="/user")
@@ -39,6 +64,7 @@ app.include_router(router=monsterRewardO.router,
 app.include_router(router=itemO.router, prefix="/item")
 app.include_router(router=eventO.router, prefix="/event")
 app.include_router(router=mapO.router, prefix="")
+app.include_router(router=metricsO.router)
 
 
 # BO
@@ -1,54 +1,106 @@
 import logging
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from dependencies.db import get_db
+from dependencies.db import get_db, get_read_db
 from schemas.event import (
     AddEventResultRequest, AddItemToEventResultRequest, CreateEventRequest, 
     EditEventRequest, EditEventResultItemProbRequest, EditEventResultRequest, 
-    EventData, ListEventsResponse
+    EventData, ListEventsResponse, SimulateEventRequest, SimulateEventResponse
 )
 from core_system.services.event_service import (
     create_event_result_service, create_event_service, create_general_logic, 
     delete_event, delete_event_result, edit_event_result_service, 
-    edit_event_service, fetch_events, get_event_by_event_id, get_event_result
+    edit_event_service, get_event_by_event_id, get_event_result
 )
 from core_system.services.reward_pool_service import (
     add_reward_pool, add_reward_pool_item, edit_reward_pool_item, remove_reward_pool_item
 )
+from services.async_query import AnySession
+from services.event_simulator import simulate_event
+from services.pagination import paginate
+from services.search_service import event_search_filters
+from services.map_query_service import get_event_cls
+from util.entity_cache import cached_entity, invalidate_entity, invalidate_namespace
 
 router = APIRouter()
 
 # -------------------------- Event APIs -------------------------- #
 
+def event_sort_columns(event_cls) -> dict:
+    return {"id": event_cls.id, "name": event_cls.name}
+
+
 @router.get("/list-event", response_model=ListEventsResponse)
-def get_event_list(
+async def get_event_list(
     prev_id: Optional[int] = Query(None),
     next_id: Optional[int] = Query(None, description="從此 ID 之後的項目"),
+    token: Optional[str] = Query(None, description="上一頁 / 下一頁的 token（next_token / prev_token）"),
+    sort: str = Query("id", description="排序欄位：id, name"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="asc 或 desc"),
     limit: int = Query(20, ge=1, le=100, description="每頁項目數"),
-    db: Session = Depends(get_db)
+    db: AnySession = Depends(get_read_db)
 ):
-    direction = "prev" if prev_id else "next"
-    started_id = prev_id if prev_id else next_id
-    fetch_limit = limit + 1
+    event_cls = get_event_cls()
+    try:
+        page = await paginate(
+            db, [event_cls.id, event_cls.name, event_cls.description], event_cls.id,
+            event_sort_columns(event_cls),
+            prev_id=prev_id, next_id=next_id, token=token, sort=sort, order=order, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    events = fetch_events(db, started_id, fetch_limit, direction)
-    has_more = len(events) == fetch_limit
+    return ListEventsResponse(
+        last_id=page.next_id,
+        has_next=page.has_next,
+        has_prev=page.has_prev,
+        next_token=page.next_token,
+        prev_token=page.prev_token,
+        event_list=[
+            EventData(
+                event_id=event.id,
+                name=event.name,
+                description=event.description
+            ) for event in page.rows
+        ]
+    )
 
-    if has_more:
-        events.pop()
 
-    last_id = events[-1].id if events else None
+@router.get("/search", response_model=ListEventsResponse)
+async def search_events(
+    q: Optional[str] = Query(None, description="名稱 / 描述關鍵字"),
+    event_type: Optional[str] = Query(None, description="事件類型"),
+    prev_id: Optional[int] = Query(None),
+    next_id: Optional[int] = Query(None, description="從此 ID 之後的項目"),
+    token: Optional[str] = Query(None, description="上一頁 / 下一頁的 token（next_token / prev_token）"),
+    sort: str = Query("id", description="排序欄位：id, name"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="asc 或 desc"),
+    limit: int = Query(20, ge=1, le=100, description="每頁項目數"),
+    db: AnySession = Depends(get_read_db)
+):
+    event_cls = get_event_cls()
+    try:
+        page = await paginate(
+            db, [event_cls.id, event_cls.name, event_cls.description], event_cls.id,
+            event_sort_columns(event_cls),
+            prev_id=prev_id, next_id=next_id, token=token, sort=sort, order=order, limit=limit,
+            filters=event_search_filters(q=q, event_type=event_type))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return ListEventsResponse(
-        last_id=last_id,
+        last_id=page.next_id,
+        has_next=page.has_next,
+        has_prev=page.has_prev,
+        next_token=page.next_token,
+        prev_token=page.prev_token,
         event_list=[
             EventData(
                 event_id=event.id,
                 name=event.name,
                 description=event.description
-            ) for event in events
+            ) for event in page.rows
         ]
     )
 
@@ -89,29 +141,52 @@ def edit_event(event_id: int, data: EditEventRequest, db: Session = Depends(get_
         name=data.name
     )
     db.commit()
+    invalidate_entity("event_detail", event_id)
     return {"message": "success"}
 
 
 @router.get("/detail/{event_id}")
 def get_event_detail(event_id: int, db: Session = Depends(get_db)):
-    event = get_event_by_event_id(db=db, event_id=event_id)
-    return {
-        "event_id": event.id,
-        "name": event.name,
-        "type": event.type,
-        "description": event.description,
-        "story_text": event.general_logic.get_story_text(),
-        "result_list": [
-            {"name": result.name, "result_id": result.id}
-            for result in event.general_logic.event_results
-        ]
-    }
+    def load():
+        event = get_event_by_event_id(db=db, event_id=event_id)
+        if not event:
+            return None
+        return {
+            "event_id": event.id,
+            "name": event.name,
+            "type": event.type,
+            "description": event.description,
+            "story_text": event.general_logic.get_story_text(),
+            "result_list": [
+                {"name": result.name, "result_id": result.id}
+                for result in event.general_logic.event_results
+            ]
+        }
+
+    event = cached_entity("event_detail", event_id, load)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return event
+
+
+@router.post("/{event_id}/simulate", response_model=SimulateEventResponse)
+def simulate_event_outcomes(event_id: int, data: SimulateEventRequest, db: Session = Depends(get_db)):
+    try:
+        return simulate_event(
+            db=db,
+            event_id=event_id,
+            players=[p.model_dump() for p in data.players],
+            seed=data.seed
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
 
 @router.delete("/{event_id}")
 def remove_event(event_id: int, db: Session = Depends(get_db)):
     delete_event(db=db, event_id=event_id)
     db.commit()
+    invalidate_entity("event_detail", event_id)
     return {"message": "success"}
 
 # ---------------------- Event Result APIs ---------------------- #
@@ -127,6 +202,7 @@ def create_event_result(data: AddEventResultRequest, db: Session = Depends(get_d
         general_event_logic_id=event.general_logic.id
     )
     db.commit()
+    invalidate_entity("event_detail", data.event_id)
     return {"message": "success"}
 
 
@@ -143,6 +219,8 @@ def edit_event_result(result_id: int, data: EditEventResultRequest, db: Session
         status_effects_json=data.status_effects_json
     )
     db.commit()
+    # 結果名稱會出現在事件詳細資料中，但這裡無法直接得知所屬事件
+    invalidate_namespace("event_detail")
     return {"message": "success"}
 
 
@@ -170,6 +248,7 @@ def get_event_result_detail(event_result_id: int, db: Session = Depends(get_db))
 def remove_event_result(event_result_id: int, db: Session = Depends(get_db)):
     delete_event_result(db=db, result_id=event_result_id)
     db.commit()
+    invalidate_namespace("event_detail")
     return {"message": "success"}
 
 # ---------------------- Reward Pool Item APIs ---------------------- #
@@ -1,90 +1,192 @@
 from fastapi import Query
-from typing import List, Optional
-from core_system.services.item_service import fetch_items, get_item_by_id
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, Dict, List, Optional
+from core_system.services.item_service import get_item_by_id
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from sqlalchemy.orm import Session
 from core_system.models import Item
-from dependencies.db import get_db
+from dependencies.db import get_db, get_read_db
 from core_system.models.items import RewardPoolItem
-from schemas.item import AddItemRequest, EditItemRequest, GetItemDetailResponse, ItemListSchema, ItemSchema
+from schemas.bulk import BulkImportResponse
+from schemas.item import (
+    ITEM_BATCH_MAX_IDS, AddItemRequest, EditItemRequest, GetItemDetailResponse, ItemBatchRequest,
+    ItemBatchResponse, ItemListSchema, ItemSchema
+)
+from services.async_query import AnySession, fetch_rows_by_ids
+from services.bulk_import_service import DEFAULT_CHUNK_SIZE, bulk_import, iter_upload_rows
+from services.pagination import paginate
+from services.search_service import item_search_filters
+from util.entity_cache import cached_entity, invalidate_entity
 import logging
 
 
 router = APIRouter()
 
+ITEM_LIST_COLUMNS = [Item.id, Item.item_type, Item.name, Item.description]
+# 可排序欄位（皆以 id 打破平手）
+ITEM_SORT_COLUMNS = {"id": Item.id, "name": Item.name, "price": Item.price, "rarity": Item.rarity}
+
 
 @router.get("/list_items", response_model=ItemListSchema)
-def get_list_items(
+async def get_list_items(
     prev_id: Optional[int] = Query(None),
     next_id: Optional[int] = Query(None, description="從此 ID 之後的項目"),
+    token: Optional[str] = Query(None, description="上一頁 / 下一頁的 token（next_token / prev_token）"),
+    sort: str = Query("id", description="排序欄位：id, name, price, rarity"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="asc 或 desc"),
     item_type: Optional[str] = Query(None, description="項目類型"),
     limit: int = Query(20, ge=1, le=100, description="每頁項目數"),
-    db: Session = Depends(get_db)
+    db: AnySession = Depends(get_read_db)
 ):
-    # 設定方向為 next，始終使用 next_id 進行分頁
-    if prev_id:
-        direction = "prev"
-        started_id = prev_id
-    else:
-        direction = "next"
-        started_id = next_id
-
-    # 增加額外一筆資料來判斷是否有更多
-    fetch_limit = limit + 1
-
-    # 獲取項目
-    items = fetch_items(db, item_type, started_id, fetch_limit, direction)
+    filters = [Item.item_type == item_type] if item_type else []
+    try:
+        page = await paginate(
+            db, ITEM_LIST_COLUMNS, Item.id, ITEM_SORT_COLUMNS,
+            prev_id=prev_id, next_id=next_id, token=token, sort=sort, order=order, limit=limit, filters=filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # 判斷是否還有更多資料
-    has_more = len(items) == fetch_limit
+    return ItemListSchema(
+        last_id=page.next_id,  # 沒有下一頁時為 None
+        has_next=page.has_next,
+        has_prev=page.has_prev,
+        next_token=page.next_token,
+        prev_token=page.prev_token,
+        item_data=[  # 返回項目資料
+            ItemSchema(
+                item_id=item.id,
+                item_type=item.item_type,
+                name=item.name,
+                description=item.description
+            )
+            for item in page.rows
+        ]
+    )
 
-    # 若有更多資料，移除額外多取的項目
-    if has_more:
-        items.pop()
 
-    # 如果資料少於 limit，表示沒有更多資料，last_id 設為 None
-    if not prev_id and not has_more:
-        last_id = None
-    else:
-        last_id = items[-1].id
+@router.get("/search", response_model=ItemListSchema)
+async def search_items(
+    q: Optional[str] = Query(None, description="名稱 / 描述關鍵字"),
+    item_type: Optional[str] = Query(None, description="項目類型"),
+    slot: Optional[str] = Query(None, description="裝備欄位"),
+    min_rarity: Optional[int] = Query(None),
+    max_rarity: Optional[int] = Query(None),
+    min_price: Optional[int] = Query(None),
+    max_price: Optional[int] = Query(None),
+    prev_id: Optional[int] = Query(None),
+    next_id: Optional[int] = Query(None, description="從此 ID 之後的項目"),
+    token: Optional[str] = Query(None, description="上一頁 / 下一頁的 token（next_token / prev_token）"),
+    sort: str = Query("id", description="排序欄位：id, name, price, rarity"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="asc 或 desc"),
+    limit: int = Query(20, ge=1, le=100, description="每頁項目數"),
+    db: AnySession = Depends(get_read_db)
+):
+    try:
+        filters = item_search_filters(
+            q=q, item_type=item_type, slot=slot,
+            min_rarity=min_rarity, max_rarity=max_rarity, min_price=min_price, max_price=max_price)
+        page = await paginate(
+            db, ITEM_LIST_COLUMNS, Item.id, ITEM_SORT_COLUMNS,
+            prev_id=prev_id, next_id=next_id, token=token, sort=sort, order=order, limit=limit, filters=filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return ItemListSchema(
-        last_id=last_id,  # 返回最後一筆資料的 ID
-        item_data=[  # 返回項目資料
+        last_id=page.next_id,
+        has_next=page.has_next,
+        has_prev=page.has_prev,
+        next_token=page.next_token,
+        prev_token=page.prev_token,
+        item_data=[
             ItemSchema(
                 item_id=item.id,
                 item_type=item.item_type,
                 name=item.name,
                 description=item.description
             )
-            for item in items
+            for item in page.rows
         ]
     )
 
 
+async def batch_lookup_items(item_ids: List[int], db: AnySession) -> ItemBatchResponse:
+    rows, missing = await fetch_rows_by_ids(db, ITEM_LIST_COLUMNS, Item.id, item_ids)
+    return ItemBatchResponse(
+        item_data=[
+            ItemSchema(
+                item_id=item.id,
+                item_type=item.item_type,
+                name=item.name,
+                description=item.description
+            )
+            for item in rows
+        ],
+        missing_ids=missing
+    )
+
+
+@router.get("/batch", response_model=ItemBatchResponse)
+async def get_items_batch(
+    ids: List[str] = Query(..., description="項目 ID，可重複帶 ids=1&ids=2 或以逗號分隔 ids=1,2"),
+    db: AnySession = Depends(get_read_db)
+):
+    try:
+        item_ids = [int(part) for value in ids for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be integers")
+    if not item_ids:
+        raise HTTPException(status_code=400, detail="ids is required")
+    if len(item_ids) > ITEM_BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {ITEM_BATCH_MAX_IDS} ids per request")
+    return await batch_lookup_items(item_ids, db)
+
+
+@router.post("/batch", response_model=ItemBatchResponse)
+async def post_items_batch(data: ItemBatchRequest, db: AnySession = Depends(get_read_db)):
+    # id 數量多時 query string 會過長，改用 POST body
+    return await batch_lookup_items(data.item_ids, db)
+
+
 @router.get("/{item_id}", response_model=ItemSchema)
 def get_item(
     item_id: int,
     db: Session = Depends(get_db)
 ):
-    item = get_item_by_id(db=db, item_id=item_id)
+    def load():
+        item = get_item_by_id(db=db, item_id=item_id)
+        if not item:
+            return None
+        return ItemSchema(
+            item_id=item.id,
+            item_type=item.item_type,
+            name=item.name,
+            description=item.description
+        ).model_dump(mode="json")
 
+    item = cached_entity("item", item_id, load)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    return ItemSchema(
-        item_id=item.id,
-        item_type=item.item_type,
-        name=item.name,
-        description=item.description
-    )
+    return item
 
 
 @router.get("/item_detail/{item_id}", response_model=GetItemDetailResponse)
 def get_item_detail(item_id: int, db: Session = Depends(get_db)):
-    item = get_item_by_id(db=db, item_id=item_id)
-    logging.info(f"Item data: {type(item)}")
-    return GetItemDetailResponse.model_validate(item)
+    def load():
+        item = get_item_by_id(db=db, item_id=item_id)
+        if not item:
+            return None
+        return GetItemDetailResponse.model_validate(item).model_dump(mode="json", by_alias=True)
+
+    item = cached_entity("item_detail", item_id, load)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    return item
+
+
+def invalidate_item_cache(item_id: int) -> None:
+    invalidate_entity("item", item_id)
+    invalidate_entity("item_detail", item_id)
 
 
 @router.delete("/RemoveItem")
@@ -93,19 +195,62 @@ def remove_item(item_id: int = Query(...), db: Session = Depends(get_db)):
     db.commit()
     db.query(Item).filter(Item.id == item_id).delete()
     db.commit()
+    invalidate_item_cache(item_id)
     return {"message": "success"}
 
 
 @router.post("/AddItem")
 def add_item(data: List[AddItemRequest], db: Session = Depends(get_db)):
     for item in data:
-        drop = Item(**item.model_dump(by_alias=True))
-        db.add(drop)
-        db.commit()
-    db.refresh(drop)
+        db.add(Item(**item.model_dump(by_alias=True)))
+    db.commit()
     return {"message": "success"}
 
 
+@router.post(
+    "/BulkImportItems",
+    response_model=BulkImportResponse,
+    description="""
+驗證失敗的資料逐筆列在 `errors` 並略過，其餘資料照常寫入。
+
+以 `chunk_size` 筆為一個交易寫入。寫入時的資料庫錯誤（例如違反唯一約束）
+只會讓該筆失敗並列在 `errors`，`inserted` 為實際寫入的筆數。
+""",
+)
+def bulk_import_items(
+    data: List[Dict[str, Any]],
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=5000, description="每個交易寫入的筆數"),
+    dry_run: bool = Query(False, description="只驗證不寫入"),
+    db: Session = Depends(get_db)
+):
+    return bulk_import(db, Item, AddItemRequest, data, chunk_size=chunk_size, dry_run=dry_run)
+
+
+@router.post(
+    "/BulkImportItems/upload",
+    response_model=BulkImportResponse,
+    description="""
+上傳 ndjson 或 csv 檔案（UTF-8，可含 BOM；其他編碼回傳 400，不寫入任何資料）。
+驗證失敗的資料逐筆列在 `errors` 並略過，其餘資料照常寫入。
+
+以 `chunk_size` 筆為一個交易寫入。寫入時的資料庫錯誤（例如違反唯一約束）
+只會讓該筆失敗並列在 `errors`，`inserted` 為實際寫入的筆數。
+""",
+)
+def bulk_import_items_upload(
+    file: UploadFile = File(...),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="檔案格式：ndjson 或 csv"),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=5000, description="每個交易寫入的筆數"),
+    dry_run: bool = Query(False, description="只驗證不寫入"),
+    db: Session = Depends(get_db)
+):
+    try:
+        rows = iter_upload_rows(file, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return bulk_import(db, Item, AddItemRequest, rows, chunk_size=chunk_size, dry_run=dry_run)
+
+
 @router.put("/edit_item/{item_id}")
 def edit_item(item_id: int, data: EditItemRequest, db: Session = Depends(get_db)):
     logging.info(item_id)
@@ -120,5 +265,6 @@ def edit_item(item_id: int, data: EditItemRequest, db: Session = Depends(get_db)
 
     db.commit()
     db.refresh(item)
+    invalidate_item_cache(item_id)
 
     return {"message": "Item updated successfully", "item_id": item.id}
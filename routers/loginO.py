@@ -1,26 +1,43 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from core_system.models.user import User
+import math
+from fastapi import APIRouter, HTTPException, status
 from core_system.services.auth_service import authenticate_user, AuthenticationError
-from dependencies.db import get_db
-from dependencies.user import get_current_user
+from dependencies.db import session_scope
 from schemas.login import LoginRequest, Token
+from util.login_pool import LoginBusyError, LoginThrottledError, login_pool
 
 
 router = APIRouter()
 
 
+def _authenticate(username: str, password: str) -> str:
+    # 在 login_pool 的執行緒中執行，自行開啟 session
+    with session_scope() as db:
+        return authenticate_user(db, username, password)
+
+
 @router.post("/login", response_model=Token)
-async def login(form_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(form_data: LoginRequest):
     try:
-        access_token = authenticate_user(
-            db, form_data.username, form_data.password)
+        access_token = await login_pool.run(
+            form_data.username,
+            lambda: _authenticate(form_data.username, form_data.password))
         return {"access_token": access_token, "token_type": "bearer"}
     except AuthenticationError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e)
         )
+    except LoginThrottledError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+    except LoginBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
 
 
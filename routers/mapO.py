@@ -1,33 +1,56 @@
 import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Header, Query, HTTPException, Response
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from core_system.models.maps import Map, MapArea
 from core_system.services.map_service import (
     create_maps_service,
     delete_map_service,
-    fetch_maps,
-    get_map_by_id,
     patch_map_basic_service,
     patch_map_connections_service,
     update_map_event_associations,
 )
-from dependencies.db import get_db
+from dependencies.db import get_db, get_read_db
+from services.async_query import AnySession
+from services.event_sampler import invalidate_map_event_sampler, sample_map_events
+from services.map_bulk_service import (
+    EdgeAttrs,
+    MapEventDiff,
+    apply_map_connection_edits,
+    apply_map_event_diffs,
+    edge_key,
+)
+from services.map_graph_index import get_map_graph_index, invalidate_map_graph_index
+from services.map_query_service import build_map_graph, load_map_detail
+from services.pagination import paginate
+from util.http_cache import compute_etag, etag_matches, weak_etag
 from schemas.map import (
+    BulkConnectionsOut,
+    BulkConnectionsUpdate,
+    BulkEventAssociationsOut,
+    BulkEventAssociationsUpdate,
     ConnectionsUpdate,
     CreateMapRequest,
     CreateMapResponse,
     CreatedMapInfo,
     EventAssociationOut,
     EventAssociationsUpdate,
+    EventSampleCount,
+    EventSampleOut,
     ListMapsResponse,
     MapData,
+    MapEdgeOut,
+    MapEventDiffOut,
+    MapGraphOut,
     MapNeighborOut,
     MapOut,
+    MapPathOut,
     MapUpdate,
     MessageResponse,
+    ReachableMapsOut,
 )
 
 router = APIRouter(prefix="/maps", tags=["Maps"])
@@ -43,34 +66,41 @@ router = APIRouter(prefix="/maps", tags=["Maps"])
 使用 cursor-based 分頁來獲取地圖列表。
 
 - **next_id**: 提供上次請求回傳的 `next_cursor` 來獲取下一頁。
-- **prev_id**: 提供列表第一項的 ID 來獲取上一頁 (如果有的話)。
-- 同時提供 `prev_id` 和 `next_id` 是不合法的。
+- **prev_id**: 提供上次請求回傳的 `prev_cursor` 來獲取上一頁 (如果有的話)。
+- **token**: 提供 `next_token` / `prev_token` 翻頁，可搭配 `sort`、`order` 使用。
+- `prev_id`、`next_id`、`token` 同時提供多個是不合法的。
 """,
 )
-def get_map_list(
+async def get_map_list(
     prev_id: Optional[int] = Query(None),
     next_id: Optional[int] = Query(None, description="從此 ID 之後的項目"),
+    token: Optional[str] = Query(None, description="上一頁 / 下一頁的 token（next_token / prev_token）"),
+    sort: str = Query("id", description="排序欄位：id, name"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="asc 或 desc"),
     limit: int = Query(20, ge=1, le=100, description="每頁項目數"),
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_read_db),
 ):
-    if prev_id is not None and next_id is not None:
-        raise HTTPException(status_code=400, detail="prev_id 和 next_id 不能同時提供")
-
-    direction = "prev" if prev_id is not None else "next"
-    cursor = prev_id if prev_id is not None else next_id
-
-    maps, next_cursor, prev_cursor, has_more = fetch_maps(db, cursor, limit, direction)
+    try:
+        page = await paginate(
+            db, [Map.id, Map.name, Map.description], Map.id, {"id": Map.id, "name": Map.name},
+            prev_id=prev_id, next_id=next_id, token=token, sort=sort, order=order, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return ListMapsResponse(
-        next_cursor=next_cursor,
-        prev_cursor=prev_cursor,
+        next_cursor=page.next_id,
+        prev_cursor=page.prev_id,
+        has_next=page.has_next,
+        has_prev=page.has_prev,
+        next_token=page.next_token,
+        prev_token=page.prev_token,
         map_list=[
             MapData(
                 map_id=m.id,
                 name=m.name,
                 description=m.description,
             )
-            for m in maps
+            for m in page.rows
         ],
     )
 
@@ -88,11 +118,97 @@ def create_map(data: CreateMapRequest, db: Session = Depends(get_db)):
         db.commit()
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    invalidate_map_graph_index()
 
     created_maps = [CreatedMapInfo(id=c.id, name=c.name) for c in created]
     return CreateMapResponse(message="Maps created successfully", created_maps=created_maps)
 
 
+@router.get(
+    "/graph",
+    response_model=MapGraphOut,
+    summary="匯出整個世界的地圖圖形",
+    description="""
+以少數幾次批次查詢回傳所有地圖、連線（含 `is_locked` / `required_item` / `required_level`）與事件關聯，
+並以 CSR 鄰接陣列表示。
+
+- 回應帶有弱 `ETag`（gzip / br / 未壓縮的回應內容相同但位元組不同），
+  帶上 `If-None-Match` 且內容未變時回傳 304。
+""",
+    responses={304: {"description": "圖形內容未變更"}},
+)
+def get_map_graph(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    graph = build_map_graph(db)
+    etag = compute_etag(graph)
+    # 在壓縮前以內容計算，壓縮後各編碼的位元組不同，因此以弱 ETag 送出
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": weak_etag(etag)})
+
+    response.headers["ETag"] = weak_etag(etag)
+    return MapGraphOut(version=etag.strip('"'), **graph)
+
+
+@router.get(
+    "/path",
+    response_model=MapPathOut,
+    summary="查詢兩張地圖間的最短路徑",
+    description="""
+依玩家等級與持有道具，在記憶體鄰接索引上以 BFS 找出最少跳數的路徑。
+
+- 未上鎖的連線一律可通行。
+- 上鎖的連線需滿足 `required_level` 與 `required_item`（沒有任何條件的上鎖連線視為不可通行）。
+""",
+    responses={404: {"description": "找不到指定 ID 的地圖"}},
+)
+def get_map_path(
+    from_id: int = Query(..., description="起點地圖 ID"),
+    to_id: int = Query(..., description="終點地圖 ID"),
+    level: int = Query(0, ge=0, description="玩家等級"),
+    items: List[str] = Query([], description="玩家持有的道具"),
+    db: Session = Depends(get_db),
+):
+    index = get_map_graph_index(db)
+    if from_id not in index or to_id not in index:
+        raise HTTPException(status_code=404, detail="Map not found")
+
+    path = index.shortest_path(from_id, to_id, level=level, items=items)
+    return MapPathOut(
+        from_id=from_id,
+        to_id=to_id,
+        path=path,
+        hops=len(path) - 1 if path is not None else None,
+    )
+
+
+@router.get(
+    "/{map_id}/reachable",
+    response_model=ReachableMapsOut,
+    summary="查詢可抵達的地圖",
+    description="依玩家等級與持有道具，列出從指定地圖出發可抵達的所有地圖（規則同 `/maps/path`）。",
+    responses={404: {"description": "找不到指定 ID 的地圖"}},
+)
+def get_reachable_maps(
+    map_id: int,
+    level: int = Query(0, ge=0, description="玩家等級"),
+    items: List[str] = Query([], description="玩家持有的道具"),
+    db: Session = Depends(get_db),
+):
+    index = get_map_graph_index(db)
+    if map_id not in index:
+        raise HTTPException(status_code=404, detail="Map not found")
+
+    return ReachableMapsOut(
+        map_id=map_id,
+        level=level,
+        items=items,
+        reachable=index.reachable(map_id, level=level, items=items),
+    )
+
+
 @router.get(
     "/{map_id}",
     response_model=MapOut,
@@ -101,7 +217,7 @@ def create_map(data: CreateMapRequest, db: Session = Depends(get_db)):
     responses={404: {"description": "找不到指定 ID 的地圖"}},
 )
 def get_map_details(map_id: int, db: Session = Depends(get_db)):
-    map_obj = get_map_by_id(db=db, map_id=map_id)
+    map_obj = load_map_detail(db=db, map_id=map_id)
     if not map_obj:
         raise HTTPException(status_code=404, detail="Map not found")
 
@@ -110,6 +226,123 @@ def get_map_details(map_id: int, db: Session = Depends(get_db)):
 
 # -------------------------- Map Feature APIs -------------------------- #
 
+@router.patch(
+    "/events",
+    response_model=BulkEventAssociationsOut,
+    summary="批次更新多張地圖的事件關聯",
+    description="""
+一次套用多張地圖的事件關聯變更，每張地圖的格式與 `PATCH /maps/{map_id}/events` 相同。
+
+- 不論地圖數量多少，只以固定次數的查詢讀取現況，並以 executemany 寫入最小的變更集合
+  （機率未變的 upsert 與不存在的 remove 會被略過）。
+- **normalize** 在 SQL 中完成。
+- 全部變更在同一個交易中；任何一張地圖驗證失敗則全部不套用。
+""",
+    responses={
+        404: {"description": "找不到指定 ID 的地圖或事件"},
+        400: {"description": "請求無效"},
+    },
+)
+def bulk_update_map_events(
+    payload: BulkEventAssociationsUpdate,
+    session: Session = Depends(get_db),
+):
+    diffs = [
+        MapEventDiff(
+            map_id=m.map_id,
+            upsert={e.event_id: e.probability for e in (m.upsert or [])},
+            remove=set(m.remove or []),
+            normalize=m.normalize,
+        )
+        for m in payload.maps
+    ]
+    try:
+        results = apply_map_event_diffs(session, diffs)
+        session.commit()
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=404 if "not found" in str(ve).lower() else 400,
+            detail=str(ve),
+        )
+    except SQLAlchemyError as e:
+        session.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    for r in results:
+        invalidate_map_event_sampler(r.map_id)
+
+    return BulkEventAssociationsOut(
+        inserted=sum(r.inserted for r in results),
+        updated=sum(r.updated for r in results),
+        removed=sum(r.removed for r in results),
+        maps=[
+            MapEventDiffOut(
+                map_id=r.map_id,
+                inserted=r.inserted,
+                updated=r.updated,
+                removed=r.removed,
+                events=[EventAssociationOut(**e) for e in r.events],
+            )
+            for r in results
+        ],
+    )
+
+
+@router.patch(
+    "/connections",
+    response_model=BulkConnectionsOut,
+    summary="批次編輯地圖連線（新增/修改/移除）",
+    description="""
+一次編輯任意多張地圖之間的無方向連線。
+
+- **connections**: 新增或更新連線（含條件）；A–B 與 B–A 視為同一條，與既有連線比對時也不分方向。
+- **remove_connections**: 移除指定的連線。
+- 以一次查詢驗證所有地圖、一次查詢讀取既有連線，並以 executemany 寫入最小的變更集合。
+- 全部變更在同一個交易中；任何地圖不存在則全部不套用。
+""",
+    responses={
+        404: {"description": "找不到指定 ID 的地圖"},
+        400: {"description": "連線操作失敗"},
+    },
+)
+def bulk_patch_map_connections(
+    payload: BulkConnectionsUpdate,
+    session: Session = Depends(get_db),
+):
+    upsert = {
+        edge_key(c.map_a_id, c.map_b_id): EdgeAttrs(c.is_locked, c.required_item, c.required_level)
+        for c in (payload.connections or [])
+    }
+    remove = {edge_key(c.map_a_id, c.map_b_id) for c in (payload.remove_connections or [])}
+    try:
+        result = apply_map_connection_edits(session, upsert, remove)
+        session.commit()
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=404 if "not found" in str(ve).lower() else 400,
+            detail=str(ve),
+        )
+    except SQLAlchemyError as e:
+        session.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    invalidate_map_graph_index()
+
+    return BulkConnectionsOut(
+        inserted=result.inserted,
+        updated=result.updated,
+        removed=result.removed,
+        connections=[
+            MapEdgeOut(
+                map_a_id=a,
+                map_b_id=b,
+                is_locked=attrs.is_locked,
+                required_item=attrs.required_item,
+                required_level=attrs.required_level,
+            )
+            for (a, b), attrs in sorted(result.connections.items())
+        ],
+    )
+
+
 @router.patch(
     "/{map_id}/events",
     response_model=List[EventAssociationOut],
@@ -147,6 +380,7 @@ def update_map_events(
         )
     except RuntimeError as re:
         raise HTTPException(status_code=400, detail=str(re))
+    invalidate_map_event_sampler(map_id)
 
     return [
         EventAssociationOut(
@@ -158,6 +392,35 @@ def update_map_events(
     ]
 
 
+@router.get(
+    "/{map_id}/events/sample",
+    response_model=EventSampleOut,
+    summary="模擬地圖事件抽樣",
+    description="""
+以快取的事件機率分布，透過多項分布一次產生地圖事件抽樣 `n` 次的各事件次數（耗時與 `n` 無關）。
+
+- 機率總和小於 1 時，剩餘機率視為未觸發事件（`event_id` 為 null）。
+- 提供 `seed` 可重現結果。
+""",
+    responses={404: {"description": "找不到指定 ID 的地圖"}},
+)
+def sample_events(
+    map_id: int,
+    n: int = Query(1, ge=1, le=10_000_000, description="抽樣次數"),
+    seed: Optional[int] = Query(None, description="亂數種子"),
+    db: Session = Depends(get_db),
+):
+    if db.get(Map, map_id) is None:
+        raise HTTPException(status_code=404, detail="Map not found")
+
+    results = sample_map_events(db, map_id=map_id, n=n, seed=seed)
+    return EventSampleOut(
+        map_id=map_id,
+        draws=n,
+        results=[EventSampleCount(**r) for r in results],
+    )
+
+
 @router.patch(
     "/{map_id}",
     response_model=MapOut,
@@ -176,7 +439,7 @@ def patch_map_basic(
     session: Session = Depends(get_db),
 ):
     try:
-        map_obj = patch_map_basic_service(
+        patch_map_basic_service(
             db=session,
             map_id=map_id,
             name=payload.name,
@@ -189,6 +452,10 @@ def patch_map_basic(
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    map_obj = load_map_detail(db=session, map_id=map_id)
+    if not map_obj:
+        raise HTTPException(status_code=404, detail="Map not found after update")
+
     return build_map_out_response(map_obj)
 
 
@@ -225,22 +492,13 @@ def patch_map_connections(
         raise HTTPException(status_code=status, detail=detail)
     except RuntimeError as re:
         raise HTTPException(status_code=400, detail=str(re))
+    invalidate_map_graph_index()
 
-    map_obj = get_map_by_id(db=session, map_id=map_id)
+    map_obj = load_map_detail(db=session, map_id=map_id)
     if not map_obj:
         raise HTTPException(status_code=404, detail="Map not found after update")
 
-    neighbors_out: List[MapNeighborOut] = []
-    for conn in map_obj.connections_a:
-        neighbors_out.append(
-            MapNeighborOut.model_validate(conn.map_b, context={"connection": conn})
-        )
-    for conn in map_obj.connections_b:
-        neighbors_out.append(
-            MapNeighborOut.model_validate(conn.map_a, context={"connection": conn})
-        )
-
-    return neighbors_out
+    return build_neighbors_out(map_obj)
 
 
 @router.delete(
@@ -255,15 +513,18 @@ def remove_map(map_id: int, db: Session = Depends(get_db)):
     if not delete_map_service(db=db, map_id=map_id):
         raise HTTPException(status_code=404, detail="Map not found")
     db.commit()
+    invalidate_map_graph_index()
+    invalidate_map_event_sampler(map_id)
     return MessageResponse(message="Map removed successfully")
 
 
 # ---------------------- Helper Functions ---------------------- #
 
 
-def build_map_out_response(map_obj: Map) -> MapOut:
+def build_neighbors_out(map_obj: Map) -> List[MapNeighborOut]:
     """
-    Helper to build the MapOut response model from a Map ORM object.
+    Helper to build the neighbor list (both connection directions) of a Map.
+    Expects the map to be loaded via `load_map_detail` to avoid lazy loads.
     """
     neighbors_out: List[MapNeighborOut] = []
     for conn in map_obj.connections_a:
@@ -288,7 +549,13 @@ def build_map_out_response(map_obj: Map) -> MapOut:
                 required_level=conn.required_level,
             )
         )
+    return neighbors_out
 
+
+def build_map_out_response(map_obj: Map) -> MapOut:
+    """
+    Helper to build the MapOut response model from a Map ORM object.
+    """
     events_out: List[EventAssociationOut] = []
     for assoc in map_obj.event_associations:
         events_out.append(
@@ -304,7 +571,7 @@ def build_map_out_response(map_obj: Map) -> MapOut:
         name=map_obj.name,
         description=map_obj.description,
         image_url=map_obj.image_url,
-        neighbors=neighbors_out,
+        neighbors=build_neighbors_out(map_obj),
         events=events_out,
     )
 
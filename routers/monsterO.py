@@ -1,74 +1,141 @@
-import logging
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Iterator, List, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from core_system.models.monsters import Monster
-from dependencies.db import get_db
-from schemas.monster import AddMonsterRequest, EditMonsterRequest, GetMonsterDetailResponse, MonsterListSchema, MonsterSchema
-from core_system.services.monster_service import fetch_monsters, get_monster_by_id
+from dependencies.db import get_db, get_read_db, session_scope
+from schemas.bulk import BulkImportResponse
+from schemas.monster import AddMonsterRequest, BulkImportMonstersRequest, EditMonsterRequest, GetMonsterDetailResponse, MonsterListSchema, MonsterSchema
+from core_system.services.monster_service import get_monster_by_id
 from core_system.services.reward_pool_service import add_reward_pool, remove_reward_pool
+from services.async_query import AnySession
+from services.bulk_import_service import DEFAULT_CHUNK_SIZE, bulk_import_monsters, iter_upload_rows
+from services.pagination import paginate
+from services.search_service import monster_search_filters
+from util.entity_cache import cached_entity, invalidate_entity
+from util.streaming import iter_json_array, iter_ndjson
 
 
 router = APIRouter()
 
 
-@router.get("/ListAllMonsters", response_model=List[MonsterSchema])
-def get_monsters(db: Session = Depends(get_db)):
-    monsters = db.query(Monster).all()
+STREAM_BATCH_SIZE = 1000
+# 可供 ListAllMonsters 選擇輸出的欄位
+MONSTER_EXPORT_COLUMNS = {
+    "id": Monster.id,
+    "name": Monster.name,
+    "drop_pool_id": Monster.drop_pool_id,
+    "hp": Monster.hp,
+    "mp": Monster.mp,
+    "atk": Monster.atk,
+    "spd": Monster.spd,
+    "def_": Monster.def_,
+}
+# 列表可排序欄位（皆以 id 打破平手）
+MONSTER_SORT_COLUMNS = {f: MONSTER_EXPORT_COLUMNS[f] for f in ("id", "name", "hp", "mp", "atk", "spd", "def_")}
 
-    # 手動填入 item_name
-    result = []
-    for m in monsters:
-        result.append(MonsterSchema(
-            id=m.id,
-            name=m.name,
-        ))
-    return result
+
+def iter_monster_rows(fields: List[str]) -> Iterator[dict]:
+    # 只查詢需要的欄位，不建立 ORM 物件
+    columns = [MONSTER_EXPORT_COLUMNS[f] for f in fields]
+    with session_scope() as db:
+        rows = db.execute(
+            select(*columns)
+            .order_by(Monster.id)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        for row in rows:
+            yield dict(zip(fields, row))
+
+
+@router.get("/ListAllMonsters")
+def get_monsters(
+    fields: List[str] = Query(["id", "name"], description=f"輸出欄位：{', '.join(MONSTER_EXPORT_COLUMNS)}"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json（JSON array）或 ndjson"),
+):
+    unknown = [f for f in fields if f not in MONSTER_EXPORT_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {unknown}")
+    fields = list(dict.fromkeys(fields))
+
+    if format == "ndjson":
+        return StreamingResponse(iter_ndjson(iter_monster_rows(fields)), media_type="application/x-ndjson")
+    return StreamingResponse(iter_json_array(iter_monster_rows(fields)), media_type="application/json")
 
 
 @router.get("/list_monster", response_model=MonsterListSchema)
-def get_list_monsters(
+async def get_list_monsters(
     prev_id: Optional[int] = Query(None),
     next_id: Optional[int] = Query(None, description="從此 ID 之後的項目"),
+    token: Optional[str] = Query(None, description="上一頁 / 下一頁的 token（next_token / prev_token）"),
+    sort: str = Query("id", description=f"排序欄位：{', '.join(MONSTER_SORT_COLUMNS)}"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="asc 或 desc"),
     limit: int = Query(20, ge=1, le=100, description="每頁項目數"),
-    db: Session = Depends(get_db)
+    db: AnySession = Depends(get_read_db)
 ):
-    # 設定方向為 next，始終使用 next_id 進行分頁
-    if prev_id:
-        direction = "prev"
-        started_id = prev_id
-    else:
-        direction = "next"
-        started_id = next_id
+    try:
+        page = await paginate(
+            db, [Monster.id, Monster.name, Monster.drop_pool_id], Monster.id, MONSTER_SORT_COLUMNS,
+            prev_id=prev_id, next_id=next_id, token=token, sort=sort, order=order, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # 增加額外一筆資料來判斷是否有更多
-    fetch_limit = limit + 1
-
-    # 獲取項目
-    monsters = fetch_monsters(db, started_id, fetch_limit, direction)
-
-    # 判斷是否還有更多資料
-    has_more = len(monsters) == fetch_limit
+    return MonsterListSchema(
+        last_id=page.next_id,  # 沒有下一頁時為 None
+        has_next=page.has_next,
+        has_prev=page.has_prev,
+        next_token=page.next_token,
+        prev_token=page.prev_token,
+        monster_data=[  # 返回項目資料
+            MonsterSchema(
+                monster_id=monster.id,
+                name=monster.name,
+                drop_pool_ids=monster.drop_pool_id
+            )
+            for monster in page.rows
+        ]
+    )
 
-    # 若有更多資料，移除額外多取的項目
-    if has_more:
-        monsters.pop()
 
-    # 如果資料少於 limit，表示沒有更多資料，last_id 設為 None
-    if not prev_id and not has_more:
-        last_id = None
-    else:
-        last_id = monsters[-1].id
+@router.get("/search", response_model=MonsterListSchema)
+async def search_monsters(
+    q: Optional[str] = Query(None, description="名稱關鍵字"),
+    drop_pool_id: Optional[int] = Query(None),
+    min_hp: Optional[int] = Query(None),
+    max_hp: Optional[int] = Query(None),
+    min_atk: Optional[int] = Query(None),
+    max_atk: Optional[int] = Query(None),
+    prev_id: Optional[int] = Query(None),
+    next_id: Optional[int] = Query(None, description="從此 ID 之後的項目"),
+    token: Optional[str] = Query(None, description="上一頁 / 下一頁的 token（next_token / prev_token）"),
+    sort: str = Query("id", description=f"排序欄位：{', '.join(MONSTER_SORT_COLUMNS)}"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="asc 或 desc"),
+    limit: int = Query(20, ge=1, le=100, description="每頁項目數"),
+    db: AnySession = Depends(get_read_db)
+):
+    try:
+        filters = monster_search_filters(
+            q=q, drop_pool_id=drop_pool_id, min_hp=min_hp, max_hp=max_hp, min_atk=min_atk, max_atk=max_atk)
+        page = await paginate(
+            db, [Monster.id, Monster.name, Monster.drop_pool_id], Monster.id, MONSTER_SORT_COLUMNS,
+            prev_id=prev_id, next_id=next_id, token=token, sort=sort, order=order, limit=limit, filters=filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return MonsterListSchema(
-        last_id=last_id,  # 返回最後一筆資料的 ID
-        monster_data=[  # 返回項目資料
+        last_id=page.next_id,
+        has_next=page.has_next,
+        has_prev=page.has_prev,
+        next_token=page.next_token,
+        prev_token=page.prev_token,
+        monster_data=[
             MonsterSchema(
                 monster_id=monster.id,
                 name=monster.name,
                 drop_pool_ids=monster.drop_pool_id
             )
-            for monster in monsters
+            for monster in page.rows
         ]
     )
 
@@ -78,25 +145,41 @@ def get_monster(
     monster_id: int,
     db: Session = Depends(get_db)
 ):
-    monster = get_monster_by_id(db=db, monster_id=monster_id)
+    def load():
+        monster = get_monster_by_id(db=db, monster_id=monster_id)
+        if not monster:
+            return None
+        return MonsterSchema(
+            monster_id=monster.id,
+            name=monster.name,
+            drop_pool_ids=monster.drop_pool_id
+        ).model_dump(mode="json")
+
+    monster = cached_entity("monster", monster_id, load)
     if not monster:
         raise HTTPException(status_code=404, detail="monster not found")
 
-    return MonsterSchema(
-        monster_id=monster.id,
-        name=monster.name,
-        drop_pool_ids=monster.drop_pool_id
-    )
+    return monster
 
 
 @router.get("/monster_detail/{monster_id}", response_model=GetMonsterDetailResponse)
 def get_monster_detail(monster_id: int, db: Session = Depends(get_db)):
-    monster = get_monster_by_id(db=db, monster_id=monster_id)
-    logging.info(monster.drop_pool_id)
-    a = GetMonsterDetailResponse.model_validate(monster)
-    logging.info(a.drop_pool_id)
+    def load():
+        monster = get_monster_by_id(db=db, monster_id=monster_id)
+        if not monster:
+            return None
+        return GetMonsterDetailResponse.model_validate(monster).model_dump(mode="json", by_alias=True)
+
+    monster = cached_entity("monster_detail", monster_id, load)
+    if not monster:
+        raise HTTPException(status_code=404, detail="monster not found")
+
+    return monster
+
 
-    return GetMonsterDetailResponse.model_validate(monster)
+def invalidate_monster_cache(monster_id: int) -> None:
+    invalidate_entity("monster", monster_id)
+    invalidate_entity("monster_detail", monster_id)
 
 
 @router.put("/edit_monster/{monster_id}")
@@ -112,6 +195,7 @@ def edit_monster(monster_id: int, data: EditMonsterRequest, db: Session = Depend
 
     db.commit()
     db.refresh(monster)
+    invalidate_monster_cache(monster_id)
 
     return {"message": "Monster updated successfully", "monster_id": monster.id}
 
@@ -122,13 +206,43 @@ def add_monster(data: AddMonsterRequest, db: Session = Depends(get_db)):
         if data.auto_add_reward_pool:
             monster.drop_pool_id = add_reward_pool(
                 db=db, name=f'{monster.name}_pool')
-        drop = Monster(**monster.model_dump(by_alias=True))
-        db.add(drop)
-        db.commit()
-    db.refresh(drop)
+        db.add(Monster(**monster.model_dump(by_alias=True)))
+    db.commit()
     return {"message": "success"}
 
 
+@router.post("/BulkImportMonsters", response_model=BulkImportResponse)
+def bulk_import_monsters_json(
+    data: BulkImportMonstersRequest,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=5000, description="每個 INSERT 的筆數"),
+    dry_run: bool = Query(False, description="只驗證不寫入"),
+    db: Session = Depends(get_db)
+):
+    try:
+        return bulk_import_monsters(
+            db, data.monster_data, data.auto_add_reward_pool,
+            chunk_size=chunk_size, dry_run=dry_run)
+    except RuntimeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/BulkImportMonsters/upload", response_model=BulkImportResponse)
+def bulk_import_monsters_upload(
+    file: UploadFile = File(...),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="檔案格式：ndjson 或 csv"),
+    auto_add_reward_pool: bool = Query(False),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=5000, description="每個 INSERT 的筆數"),
+    dry_run: bool = Query(False, description="只驗證不寫入"),
+    db: Session = Depends(get_db)
+):
+    try:
+        return bulk_import_monsters(
+            db, iter_upload_rows(file, format), auto_add_reward_pool,
+            chunk_size=chunk_size, dry_run=dry_run)
+    except (ValueError, RuntimeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.delete("/RemoveMonster/{monster_id}")
 def remove_monster(monster_id: int, delete_pool: bool=Query(default=False), db: Session = Depends(get_db)):
     monster = get_monster_by_id(db=db, monster_id=monster_id)
@@ -138,5 +252,6 @@ def remove_monster(monster_id: int, delete_pool: bool=Query(default=False), db:
     if monster:
         db.delete(monster)
         db.commit()
+        invalidate_monster_cache(monster_id)
         return {"message": "success"}
     return {"message": "Failed"}
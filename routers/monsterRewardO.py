@@ -5,7 +5,8 @@ from core_system.models import RewardPoolItem, Item
 from core_system.models.monsters import Monster
 from dependencies.db import get_db
 from schemas.monster import AddDropItemSchema, MonsterSchema, RemoveDropItemSchema
-from schemas.reward import UpdateDropProbabilitySchema
+from schemas.reward import MonsterDropSimulation, SimulateDropsRequest, UpdateDropProbabilitySchema
+from services.drop_simulator import simulate_monster_drops
 from schemas.rewarditem import MonsterRewardSchema
 
 
@@ -108,3 +109,12 @@ def delete_monster_drop(data: RemoveDropItemSchema, db: Session = Depends(get_db
     else:
         raise HTTPException(
             status_code=404, detail="drop pool not found")
+
+
+@router.post("/simulate", response_model=List[MonsterDropSimulation])
+def simulate_drops(data: SimulateDropsRequest, db: Session = Depends(get_db)):
+    try:
+        return simulate_monster_drops(
+            db=db, monster_ids=data.monster_ids, kills=data.kills, seed=data.seed)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
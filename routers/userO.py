@@ -1,16 +1,71 @@
-from fastapi import APIRouter, Depends
+from typing import Iterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from core_system.models.user import User
-from dependencies.db import get_db
-from schemas.user import UserOut  # 你可以建立一個 UserOut schema
+from dependencies.db import get_db, get_read_db, session_scope
+from schemas.user import UserListResponse, UserOut  # 你可以建立一個 UserOut schema
+from services.async_query import AnySession
+from services.pagination import paginate
+from util.streaming import iter_json_array, iter_ndjson
 
 router = APIRouter()
 
+STREAM_BATCH_SIZE = 1000
+USER_OUT_COLUMNS = (User.id, User.username, User.current_map_id, User.money, User.last_login)
+USER_SORT_COLUMNS = {"id": User.id, "username": User.username, "money": User.money}
+
+
+def iter_users(batch_size: int = STREAM_BATCH_SIZE) -> Iterator[UserOut]:
+    """以 yield_per 分批讀取欄位並逐筆轉成 UserOut，記憶體用量與資料表大小無關。"""
+    with session_scope() as db:
+        rows = db.execute(
+            select(*USER_OUT_COLUMNS)
+            .order_by(User.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for row in rows:
+            yield UserOut.model_validate(row)
+
 
 @router.get("/get_all_user", response_model=list[UserOut])
-def get_all_users(db: Session = Depends(get_db)):
-    users = db.query(User).all()
-    return users
+def get_all_users():
+    # 回應格式不變，但改為串流輸出的 JSON array
+    return StreamingResponse(iter_json_array(iter_users()), media_type="application/json")
+
+
+@router.get("/list_user", response_model=UserListResponse)
+async def get_user_list(
+    prev_id: Optional[int] = Query(None),
+    next_id: Optional[int] = Query(None, description="從此 ID 之後的項目"),
+    token: Optional[str] = Query(None, description="上一頁 / 下一頁的 token（next_token / prev_token）"),
+    sort: str = Query("id", description="排序欄位：id, username, money"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="asc 或 desc"),
+    limit: int = Query(50, ge=1, le=500, description="每頁項目數"),
+    db: AnySession = Depends(get_read_db)
+):
+    try:
+        page = await paginate(
+            db, USER_OUT_COLUMNS, User.id, USER_SORT_COLUMNS,
+            prev_id=prev_id, next_id=next_id, token=token, sort=sort, order=order, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return UserListResponse(
+        next_cursor=page.next_id,
+        has_next=page.has_next,
+        has_prev=page.has_prev,
+        next_token=page.next_token,
+        prev_token=page.prev_token,
+        user_list=[UserOut.model_validate(row) for row in page.rows]
+    )
+
+
+@router.get("/export_user")
+def export_users():
+    # 每行一筆 UserOut
+    return StreamingResponse(iter_ndjson(iter_users()), media_type="application/x-ndjson")
 
 
 # region need refactor
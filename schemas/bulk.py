@@ -0,0 +1,15 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class BulkImportError(BaseModel):
+    row: int  # 從 1 開始的資料列編號
+    error: str
+
+
+class BulkImportResponse(BaseModel):
+    valid: int  # 通過驗證的筆數
+    inserted: int
+    failed: int
+    errors: list[BulkImportError] = []
+    ids: Optional[list[Optional[int]]] = None  # 依輸入順序的新 ID（驗證失敗為 null）
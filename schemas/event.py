@@ -1,5 +1,6 @@
-from typing import Optional
-from pydantic import BaseModel
+from typing import Any, Optional
+from pydantic import BaseModel, Field
+from .pagination import CursorPageInfo
 
 
 class EventData(BaseModel):
@@ -8,8 +9,8 @@ class EventData(BaseModel):
     description: str
 
 
-class ListEventsResponse(BaseModel):
-    last_id: Optional[int] = None
+class ListEventsResponse(CursorPageInfo):
+    last_id: Optional[int] = None  # 僅 sort=id 時提供，其他排序請使用 next_token
     event_list: list[EventData] = []
 
 
@@ -76,3 +77,39 @@ class RemoveEventResultRequest(BaseModel):
 
 class RemoveEventRequest(BaseModel):
     event_id: int
+
+
+class SimulatedPlayerState(BaseModel):
+    attributes: dict[str, Any]
+    count: int = Field(default=1, ge=1)
+
+
+class SimulateEventRequest(BaseModel):
+    players: list[SimulatedPlayerState] = Field(..., min_length=1)
+    seed: Optional[int] = None
+
+
+class SimulatedResultCount(BaseModel):
+    result_id: int
+    name: Optional[str] = None
+    count: int
+
+
+class SimulatedItemCount(BaseModel):
+    item_id: int
+    item_name: str
+    count: int
+
+
+class SimulatedStatusEffectCount(BaseModel):
+    status_effect_key: str
+    count: int
+
+
+class SimulateEventResponse(BaseModel):
+    event_id: int
+    trials: int
+    unmatched: int  # 沒有任何結果符合條件的次數
+    results: list[SimulatedResultCount]
+    items: list[SimulatedItemCount]
+    status_effects: list[SimulatedStatusEffectCount]
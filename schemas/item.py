@@ -1,6 +1,7 @@
 from typing import Optional
 from enum import Enum
 from pydantic import BaseModel, Field
+from .pagination import CursorPageInfo
 from .reward import RewardPoolSchema
 
 
@@ -21,11 +22,24 @@ class ItemSchema(BaseModel):
         from_attributes = True
 
 
-class ItemListSchema(BaseModel):
-    last_id: Optional[int] = None
+class ItemListSchema(CursorPageInfo):
+    last_id: Optional[int] = None  # 僅 sort=id 時提供，其他排序請使用 next_token
     item_data: list[ItemSchema] = []
 
 
+# 單次批次查詢的 id 上限
+ITEM_BATCH_MAX_IDS = 5000
+
+
+class ItemBatchRequest(BaseModel):
+    item_ids: list[int] = Field(..., min_length=1, max_length=ITEM_BATCH_MAX_IDS)
+
+
+class ItemBatchResponse(BaseModel):
+    item_data: list[ItemSchema] = []  # 依請求順序排列（重複的 id 只回傳一次）
+    missing_ids: list[int] = []
+
+
 class GetItemDetailRequest(BaseModel):
     item_id: int
 
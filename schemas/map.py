@@ -1,5 +1,6 @@
 from typing import List, Optional
 from pydantic import BaseModel, Field, model_validator
+from .pagination import CursorPageInfo
 
 
 # ---------- Map 相關 ----------
@@ -14,10 +15,10 @@ class MapData(BaseModel):
     model_config = {"from_attributes": True}
 
 
-class ListMapsResponse(BaseModel):
+class ListMapsResponse(CursorPageInfo):
     """GET /list-map 的回應模型。"""
-    next_cursor: Optional[int] = Field(None, description="下一頁的 cursor ID。若為 null 表示沒有下一頁。")
-    prev_cursor: Optional[int] = Field(None, description="上一頁的 cursor ID。若為 null 表示沒有上一頁。")
+    next_cursor: Optional[int] = Field(None, description="下一頁的 cursor ID（僅 sort=id）。若為 null 表示沒有下一頁或使用其他排序，請改用 next_token。")
+    prev_cursor: Optional[int] = Field(None, description="上一頁的 cursor ID（僅 sort=id）。若為 null 表示沒有上一頁或使用其他排序，請改用 prev_token。")
     map_list: List[MapData] = Field(..., description="地圖資料列表")
 
 
@@ -63,6 +64,70 @@ class ConnectionsUpdate(BaseModel):
     )
 
 
+# 單次批次請求可變更的連線數上限
+MAP_BULK_MAX_EDGES = 1000
+
+
+class MapEdge(BaseModel):
+    """無方向連線的兩端（A–B 與 B–A 視為同一條）。"""
+    map_a_id: int = Field(..., description="一端的地圖 ID")
+    map_b_id: int = Field(..., description="另一端的地圖 ID")
+
+    @model_validator(mode='after')
+    def check_not_self_loop(self) -> 'MapEdge':
+        if self.map_a_id == self.map_b_id:
+            raise ValueError("A map cannot be connected to itself")
+        return self
+
+
+class MapEdgeUpsert(MapEdge):
+    """用於新增或更新無方向連線的資料模型。"""
+    is_locked: bool = Field(False, description="連線是否被鎖住")
+    required_item: Optional[str] = Field(None, description="解鎖需要的道具")
+    required_level: int = Field(0, ge=0, description="解鎖需要的等級")
+
+
+class BulkConnectionsUpdate(BaseModel):
+    """PATCH /maps/connections 的請求模型：一次變更任意多張地圖之間的連線。"""
+    connections: Optional[List[MapEdgeUpsert]] = Field(
+        None, max_length=MAP_BULK_MAX_EDGES, description="要新增或更新的連線")
+    remove_connections: Optional[List[MapEdge]] = Field(
+        None, max_length=MAP_BULK_MAX_EDGES, description="要移除的連線")
+
+    @model_validator(mode='after')
+    def check_connections(self) -> 'BulkConnectionsUpdate':
+        """同一條連線（不論方向）重複時條件必須一致，且不可同時出現在新增與移除中。"""
+        seen = {}
+        for c in self.connections or []:
+            key = tuple(sorted((c.map_a_id, c.map_b_id)))
+            attrs = (c.is_locked, c.required_item, c.required_level)
+            if seen.setdefault(key, attrs) != attrs:
+                raise ValueError(f"Conflicting duplicate connection {key[0]}-{key[1]}")
+        removed = {tuple(sorted((c.map_a_id, c.map_b_id))) for c in self.remove_connections or []}
+        conflict = removed & seen.keys()
+        if conflict:
+            raise ValueError(
+                f"Connections {sorted(conflict)} cannot be in both connections and remove_connections")
+        return self
+
+
+class MapEdgeOut(BaseModel):
+    """新增或更新後的連線（map_a_id < map_b_id）。"""
+    map_a_id: int
+    map_b_id: int
+    is_locked: bool
+    required_item: Optional[str] = None
+    required_level: int
+
+
+class BulkConnectionsOut(BaseModel):
+    """PATCH /maps/connections 的回應模型。"""
+    inserted: int = Field(..., description="新增的連線數")
+    updated: int = Field(..., description="條件有變動的連線數")
+    removed: int = Field(..., description="實際移除的連線數")
+    connections: List[MapEdgeOut] = Field(..., description="新增或更新後的連線")
+
+
 class MapUpdate(BaseModel):
     """用於更新地圖資訊（包含連線）的請求模型。"""
     name: Optional[str] = Field(None, max_length=100, description="地圖名稱（可選）")
@@ -124,6 +189,48 @@ class MapOut(BaseModel):
         },
     }
 
+
+class MapGraphOut(BaseModel):
+    """GET /maps/graph 的回應模型：整個世界地圖的緊湊鄰接陣列。
+
+    所有 index 欄位皆指向 `map_ids` 中的位置。
+    """
+    version: str = Field(..., description="圖形內容的版本（同 ETag）")
+    map_ids: List[int] = Field(..., description="所有地圖 ID（遞增排序）")
+    map_names: List[str] = Field(..., description="與 map_ids 對應的地圖名稱")
+    edge_a: List[int] = Field(..., description="每條連線的一端（map index）")
+    edge_b: List[int] = Field(..., description="每條連線的另一端（map index）")
+    edge_is_locked: List[bool] = Field(..., description="每條連線是否被鎖住")
+    edge_required_item: List[Optional[str]] = Field(..., description="每條連線解鎖需要的道具")
+    edge_required_level: List[int] = Field(..., description="每條連線解鎖需要的等級")
+    adjacency_offsets: List[int] = Field(
+        ..., description="CSR offsets，長度為地圖數 + 1")
+    adjacency_neighbors: List[int] = Field(..., description="CSR 鄰居 map index")
+    adjacency_edges: List[int] = Field(..., description="CSR 對應的連線 index")
+    event_offsets: List[int] = Field(
+        ..., description="每張地圖在 event_ids 中的範圍，長度為地圖數 + 1")
+    event_ids: List[int] = Field(..., description="事件 ID")
+    event_probabilities: List[float] = Field(..., description="與 event_ids 對應的機率")
+    event_catalog_ids: List[int] = Field(..., description="出現過的事件 ID")
+    event_catalog_names: List[str] = Field(..., description="與 event_catalog_ids 對應的事件名稱")
+
+
+class ReachableMapsOut(BaseModel):
+    """GET /maps/{map_id}/reachable 的回應模型。"""
+    map_id: int = Field(..., description="起點地圖 ID")
+    level: int = Field(..., description="查詢使用的玩家等級")
+    items: List[str] = Field(..., description="查詢使用的持有道具")
+    reachable: List[int] = Field(..., description="可抵達的地圖 ID（含起點）")
+
+
+class MapPathOut(BaseModel):
+    """GET /maps/path 的回應模型。"""
+    from_id: int = Field(..., description="起點地圖 ID")
+    to_id: int = Field(..., description="終點地圖 ID")
+    path: Optional[List[int]] = Field(None, description="最短路徑上的地圖 ID；無法抵達時為 null")
+    hops: Optional[int] = Field(None, description="路徑跳數；無法抵達時為 null")
+
+
 # ---------- Event Association 相關 ----------
 
 
@@ -170,6 +277,28 @@ class EventAssociationsUpdate(BaseModel):
         return self
 
 
+# 單次批次請求可變更的地圖數上限（對應一次 IN 查詢）
+MAP_BULK_MAX_MAPS = 500
+
+
+class MapEventAssociationsDiff(EventAssociationsUpdate):
+    """單張地圖的事件關聯變更（批次更新用）。"""
+    map_id: int = Field(..., description="地圖 ID")
+
+
+class BulkEventAssociationsUpdate(BaseModel):
+    """PATCH /maps/events 的請求模型：一次變更多張地圖的事件關聯。"""
+    maps: List[MapEventAssociationsDiff] = Field(
+        ..., min_length=1, max_length=MAP_BULK_MAX_MAPS, description="各地圖的變更")
+
+    @model_validator(mode='after')
+    def check_unique_maps(self) -> 'BulkEventAssociationsUpdate':
+        ids = [m.map_id for m in self.maps]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Duplicate map_id in maps list")
+        return self
+
+
 class EventAssociationOut(BaseModel):
     """用於回應地圖與事件關聯資訊的模型。"""
     event_id: int = Field(..., description="Event ID")
@@ -179,6 +308,37 @@ class EventAssociationOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class MapEventDiffOut(BaseModel):
+    """單張地圖的批次更新結果。"""
+    map_id: int = Field(..., description="地圖 ID")
+    inserted: int = Field(..., description="新增的關聯數")
+    updated: int = Field(..., description="機率有變動的關聯數（不含正規化）")
+    removed: int = Field(..., description="實際移除的關聯數")
+    events: List[EventAssociationOut] = Field(..., description="更新後的所有事件關聯")
+
+
+class BulkEventAssociationsOut(BaseModel):
+    """PATCH /maps/events 的回應模型。"""
+    inserted: int = Field(..., description="所有地圖新增的關聯數")
+    updated: int = Field(..., description="所有地圖更新的關聯數")
+    removed: int = Field(..., description="所有地圖移除的關聯數")
+    maps: List[MapEventDiffOut]
+
+
+class EventSampleCount(BaseModel):
+    """單一事件的抽樣次數；event_id 為 null 表示未觸發任何事件。"""
+    event_id: Optional[int] = Field(None, description="Event ID（null 表示未觸發）")
+    event_name: Optional[str] = Field(None, description="Event 名稱")
+    count: int = Field(..., description="抽中的次數")
+
+
+class EventSampleOut(BaseModel):
+    """GET /maps/{map_id}/events/sample 的回應模型。"""
+    map_id: int
+    draws: int = Field(..., description="總抽樣次數")
+    results: List[EventSampleCount]
+
+
 class MessageResponse(BaseModel):
     """通用的訊息回應模型"""
     message: str
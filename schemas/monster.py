@@ -1,6 +1,7 @@
-from typing import Optional
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field
+from .pagination import CursorPageInfo
 from .reward import RewardPoolSchema
 
 
@@ -31,8 +32,8 @@ class MonsterSchema(BaseModel):
         from_attributes = True
 
 
-class MonsterListSchema(BaseModel):
-    last_id: Optional[int] = None
+class MonsterListSchema(CursorPageInfo):
+    last_id: Optional[int] = None  # 僅 sort=id 時提供，其他排序請使用 next_token
     monster_data: list[MonsterSchema] = []
 
 
@@ -89,3 +90,8 @@ class AddMonsterRequest(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BulkImportMonstersRequest(BaseModel):
+    auto_add_reward_pool: bool = False
+    monster_data: list[dict[str, Any]]  # 逐筆以 MonsterData 驗證
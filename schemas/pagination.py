@@ -0,0 +1,11 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class CursorPageInfo(BaseModel):
+    """keyset 分頁的共用欄位。token 為不透明字串，原樣傳回 token 參數即可翻頁。"""
+    has_next: bool = False
+    has_prev: bool = False
+    next_token: Optional[str] = Field(None, description="下一頁的 token。若為 null 表示沒有下一頁。")
+    prev_token: Optional[str] = Field(None, description="上一頁的 token。若為 null 表示沒有上一頁。")
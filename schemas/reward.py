@@ -32,4 +32,29 @@ class RewardPoolSchema(BaseModel):
 class UpdateDropProbabilitySchema(BaseModel):
     monster_id: int
     item_id: int
-    probability: float = Field(..., ge=0.0, le=1.0)
\ No newline at end of file
+    probability: float = Field(..., ge=0.0, le=1.0)
+
+
+class SimulateDropsRequest(BaseModel):
+    monster_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    kills: int = Field(..., ge=1, le=1_000_000_000)
+    seed: Optional[int] = None
+
+
+class SimulatedDropItem(BaseModel):
+    item_id: int
+    item_name: str
+    probability: float
+    price: int
+    count: int  # 模擬的掉落次數
+    drop_rate: float  # count / kills
+
+
+class MonsterDropSimulation(BaseModel):
+    monster_id: int
+    monster_name: str
+    kills: int
+    expected_value: float  # 單次擊殺的期望價值（理論值）
+    simulated_value: float  # 單次擊殺的平均價值（模擬值）
+    variance: float  # 單次擊殺價值的變異數
+    items: List[SimulatedDropItem]
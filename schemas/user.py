@@ -1,5 +1,7 @@
+from typing import Optional
 from pydantic import BaseModel
 from datetime import datetime
+from .pagination import CursorPageInfo
 
 
 class UserOut(BaseModel):
@@ -11,3 +13,8 @@ class UserOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class UserListResponse(CursorPageInfo):
+    next_cursor: Optional[int] = None  # 僅 sort=id 時提供，其他排序請使用 next_token
+    user_list: list[UserOut] = []
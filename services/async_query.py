@@ -0,0 +1,43 @@
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Union
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+AnySession = Union[Session, AsyncSession]
+
+
+async def execute(db: AnySession, stmt):
+    """AsyncSession 直接 await；一般 Session 則丟到 threadpool 執行。"""
+    if isinstance(db, AsyncSession):
+        return await db.execute(stmt)
+    return await run_in_threadpool(db.execute, stmt)
+
+
+
+# 單次 IN 查詢的參數上限（SQLite 舊版預設 999）
+IN_CHUNK_SIZE = 500
+
+
+async def fetch_rows_by_ids(
+    db: AnySession,
+    columns: Sequence[Any],
+    id_column,
+    ids: Iterable[int],
+    chunk_size: int = IN_CHUNK_SIZE,
+) -> Tuple[List[Any], List[int]]:
+    """
+    以分段的 IN 查詢一次取回多筆資料。
+    回傳 (依 ids 順序排列且去除重複的資料列, 不存在的 id)。
+    """
+    ordered = list(dict.fromkeys(ids))
+    found: Dict[int, Any] = {}
+    for start in range(0, len(ordered), chunk_size):
+        chunk = ordered[start:start + chunk_size]
+        stmt = select(*columns, id_column.label("_id_key")).where(id_column.in_(chunk))
+        for row in (await execute(db, stmt)).all():
+            found[row._id_key] = row
+    rows = [found[i] for i in ordered if i in found]
+    missing = [i for i in ordered if i not in found]
+    return rows, missing
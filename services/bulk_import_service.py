@@ -0,0 +1,223 @@
+import codecs
+import csv
+import io
+from typing import Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+from fastapi import UploadFile
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from core_system.models.monsters import Monster
+from schemas.monster import MonsterData
+
+DEFAULT_CHUNK_SIZE = 500
+
+RawRow = Union[str, bytes, dict]
+
+
+UPLOAD_READ_BLOCK = 1 << 20
+
+
+def check_upload_encoding(upload: UploadFile) -> None:
+    """
+    以固定大小的區塊完整檢查一次檔案是否為 UTF-8（可含 BOM），不將整個檔案載入記憶體。
+    不是時引發 ValueError，在寫入任何資料之前就拒絕整個檔案。
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    offset = 0
+    upload.file.seek(0)
+    try:
+        while True:
+            block = upload.file.read(UPLOAD_READ_BLOCK)
+            decoder.decode(block, final=not block)
+            if not block:
+                break
+            offset += len(block)
+    except UnicodeDecodeError as e:
+        raise ValueError(f"File is not valid UTF-8 (byte {offset + e.start})")
+    finally:
+        upload.file.seek(0)
+
+
+def iter_upload_rows(upload: UploadFile, fmt: str) -> Iterator[RawRow]:
+    """
+    逐行讀取上傳檔案，不將整個檔案載入記憶體。
+
+    - ndjson: 每行一個 JSON 物件，原樣交給 pydantic 解析
+    - csv: 第一行為欄位名稱，空字串視為 None
+    以 utf-8-sig 解碼，Excel 匯出的 CSV 開頭的 BOM 不會黏在第一個欄位名稱上。
+    呼叫時立即檢查編碼，不是 UTF-8 時引發 ValueError。
+    """
+    check_upload_encoding(upload)
+    return _read_upload_rows(upload, fmt)
+
+
+def _read_upload_rows(upload: UploadFile, fmt: str) -> Iterator[RawRow]:
+    text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            for row in csv.DictReader(text):
+                yield {key: (value if value != "" else None) for key, value in row.items()}
+        else:
+            for line in text:
+                if line.strip():
+                    yield line
+    finally:
+        # 避免 wrapper 被回收時一併關閉上傳檔案
+        text.detach()
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or 'row'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+def validate_row(schema: Type[BaseModel], raw: RawRow) -> BaseModel:
+    if isinstance(raw, (str, bytes)):
+        return schema.model_validate_json(raw)
+    return schema.model_validate(raw)
+
+
+def iter_validated_chunks(
+    schema: Type[BaseModel],
+    rows: Iterable[RawRow],
+    errors: List[dict],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[List[Tuple[int, BaseModel]]]:
+    """
+    逐筆驗證並以 chunk_size 為單位產出 (row 編號, model)；
+    驗證失敗的資料會附加到 errors，不會中斷其他資料。row 編號從 1 開始。
+    """
+    chunk: List[Tuple[int, BaseModel]] = []
+    for row_no, raw in enumerate(rows, start=1):
+        try:
+            chunk.append((row_no, validate_row(schema, raw)))
+        except ValidationError as e:
+            errors.append({"row": row_no, "error": format_validation_error(e)})
+            continue
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def insert_chunk(db: Session, model, chunk: List[Tuple[int, dict]], errors: List[dict]) -> int:
+    """
+    以單一 executemany INSERT 寫入一個 chunk 並提交。
+
+    若整批失敗（例如違反約束），改以 savepoint 逐筆重試，找出失敗的資料並
+    保留其餘資料。回傳成功寫入的筆數。
+    """
+    try:
+        db.execute(insert(model), [values for _, values in chunk])
+        db.commit()
+        return len(chunk)
+    except SQLAlchemyError:
+        db.rollback()
+
+    inserted = 0
+    for row_no, values in chunk:
+        try:
+            with db.begin_nested():
+                db.execute(insert(model), [values])
+            inserted += 1
+        except SQLAlchemyError as e:
+            errors.append({"row": row_no, "error": str(e.orig) if getattr(e, "orig", None) else str(e)})
+    db.commit()
+    return inserted
+
+
+def bulk_import(
+    db: Session,
+    model,
+    schema: Type[BaseModel],
+    rows: Iterable[RawRow],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dry_run: bool = False,
+) -> dict:
+    """
+    驗證並批次寫入資料。與 bulk_import_monsters 相同：驗證失敗的資料逐筆列在 errors 並略過，
+    不影響其他資料的寫入。
+
+    每個 chunk 為一個交易，SQLite 的寫入鎖只會在 chunk 之間持有；chunk 內若有資料庫錯誤
+    （例如違反唯一約束）只有該筆失敗，inserted 為實際寫入的筆數。dry_run 時只驗證不寫入。
+    """
+    errors: List[dict] = []
+    total = inserted = 0
+    for chunk in iter_validated_chunks(schema, rows, errors, chunk_size):
+        total += len(chunk)
+        if dry_run:
+            continue
+        inserted += insert_chunk(
+            db, model, [(row_no, data.model_dump(by_alias=True)) for row_no, data in chunk], errors)
+
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "valid": total,
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": errors,
+    }
+
+
+def _insert_returning_ids(db: Session, model, values: List[dict], chunk_size: int) -> List[int]:
+    """以 executemany INSERT ... RETURNING 寫入並依參數順序回傳新 ID。"""
+    ids: List[int] = []
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    for start in range(0, len(values), chunk_size):
+        ids.extend(db.execute(stmt, values[start:start + chunk_size]).scalars().all())
+    return ids
+
+
+def bulk_import_monsters(
+    db: Session,
+    rows: Iterable[RawRow],
+    auto_add_reward_pool: bool,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dry_run: bool = False,
+) -> dict:
+    """
+    驗證並在單一交易中批次建立怪物（以及 auto_add_reward_pool 時的掉落池）。
+    與 bulk_import 相同：驗證失敗的資料逐筆列在 errors 並略過，其餘資料照常寫入。
+
+    掉落池與怪物各自以 chunk 為單位的 executemany INSERT ... RETURNING 寫入，
+    `ids` 依輸入順序回傳新怪物 ID，驗證失敗的資料為 None。
+    資料庫錯誤時整批回滾並引發 RuntimeError。
+    """
+    errors: List[dict] = []
+    valid: List[Tuple[int, MonsterData]] = []
+    for chunk in iter_validated_chunks(MonsterData, rows, errors, chunk_size):
+        valid.extend(chunk)
+    row_count = max([row_no for row_no, _ in valid] + [e["row"] for e in errors], default=0)
+
+    ids: List[Optional[int]] = [None] * row_count
+    if valid and not dry_run:
+        values = [data.model_dump(by_alias=True) for _, data in valid]
+        try:
+            if auto_add_reward_pool:
+                reward_pool = Monster.drop_pool.property.mapper.class_
+                pool_ids = _insert_returning_ids(
+                    db, reward_pool, [{"name": f"{v['name']}_pool"} for v in values], chunk_size)
+                for v, pool_id in zip(values, pool_ids):
+                    v["drop_pool_id"] = pool_id
+            monster_ids = _insert_returning_ids(db, Monster, values, chunk_size)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            raise RuntimeError(str(e.orig) if getattr(e, "orig", None) else str(e))
+        for (row_no, _), monster_id in zip(valid, monster_ids):
+            ids[row_no - 1] = monster_id
+
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "valid": len(valid),
+        "inserted": 0 if dry_run else len(valid),
+        "failed": len(errors),
+        "errors": errors,
+        "ids": ids,
+    }
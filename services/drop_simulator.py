@@ -0,0 +1,79 @@
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core_system.models import Item, RewardPoolItem
+from core_system.models.monsters import Monster
+
+
+def simulate_monster_drops(db: Session, monster_ids: List[int], kills: int, seed: Optional[int] = None) -> List[dict]:
+    """
+    對每隻怪物模擬 `kills` 次擊殺的掉落結果。
+
+    掉落池中每個道具各自以 `probability` 獨立判定，因此每個道具的掉落次數
+    服從 Binomial(kills, p)，以 NumPy 一次抽樣整個掉落池，成本與擊殺次數無關。
+    期望值與變異數以 `Item.price` 計算（單次擊殺）。
+
+    找不到的怪物 ID 會引發 ValueError。
+    """
+    monsters = db.execute(
+        select(Monster.id, Monster.name, Monster.drop_pool_id).where(Monster.id.in_(monster_ids))
+    ).all()
+    found = {m.id: m for m in monsters}
+    missing = [monster_id for monster_id in monster_ids if monster_id not in found]
+    if missing:
+        raise ValueError(f"Monster not found: {missing}")
+
+    pool_ids = {m.drop_pool_id for m in monsters if m.drop_pool_id is not None}
+    pool_rows = {}
+    if pool_ids:
+        rows = db.execute(
+            select(
+                RewardPoolItem.pool_id,
+                RewardPoolItem.item_id,
+                RewardPoolItem.probability,
+                Item.name,
+                Item.price,
+            )
+            .join(Item, Item.id == RewardPoolItem.item_id)
+            .where(RewardPoolItem.pool_id.in_(pool_ids))
+            .order_by(RewardPoolItem.pool_id, RewardPoolItem.item_id)
+        ).all()
+        for row in rows:
+            pool_rows.setdefault(row.pool_id, []).append(row)
+
+    rng = np.random.default_rng(seed)
+    results = []
+    for monster_id in monster_ids:
+        monster = found[monster_id]
+        rows = pool_rows.get(monster.drop_pool_id, [])
+        prob = np.clip(np.array([r.probability for r in rows], dtype=np.float64), 0.0, 1.0)
+        price = np.array([r.price or 0 for r in rows], dtype=np.float64)
+
+        counts = rng.binomial(kills, prob) if rows else np.zeros(0, dtype=np.int64)
+        expected_value = float(prob @ price)
+        variance = float((price ** 2) @ (prob * (1.0 - prob)))
+        simulated_value = float(counts @ price) / kills
+
+        results.append({
+            "monster_id": monster.id,
+            "monster_name": monster.name,
+            "kills": kills,
+            "expected_value": expected_value,
+            "simulated_value": simulated_value,
+            "variance": variance,
+            "items": [
+                {
+                    "item_id": r.item_id,
+                    "item_name": r.name,
+                    "probability": float(p),
+                    "price": r.price or 0,
+                    "count": int(c),
+                    "drop_rate": int(c) / kills,
+                }
+                for r, p, c in zip(rows, prob, counts)
+            ],
+        })
+    return results
@@ -0,0 +1,91 @@
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from services.map_query_service import get_event_association_cls, get_event_cls
+from util.cache import TTLCache
+
+# 多個 worker 各自持有快取，TTL 用來限制其他 worker 寫入後的過期時間
+SAMPLER_TTL_SECONDS = float(os.getenv("MAP_EVENT_SAMPLER_TTL", "60"))
+SAMPLER_CACHE_SIZE = int(os.getenv("MAP_EVENT_SAMPLER_CACHE_SIZE", "1024"))
+
+
+class OutcomeDistribution:
+    """
+    正規化後的事件機率向量，以多項分布一次產生 n 次抽樣的各事件次數，耗時與 n 無關。
+
+    機率總和小於 1 時，剩餘的機率視為「不觸發事件」（outcome 為 None）；
+    總和大於 1 時依比例正規化。
+    """
+
+    def __init__(self, outcomes: Sequence[Optional[int]], weights: Sequence[float]):
+        outcomes = list(outcomes)
+        weights = [max(float(w), 0.0) for w in weights]
+        total = sum(weights)
+        if total < 1.0:
+            outcomes.append(None)
+            weights.append(1.0 - total)
+            total = 1.0
+        self.outcomes = outcomes
+        self.weights = np.asarray(weights) / total
+
+    def draw_counts(self, n: int, rng: np.random.Generator) -> Dict[Optional[int], int]:
+        """抽樣 n 次並回傳每個 outcome 的次數（n 次獨立抽樣的次數即為多項分布）。"""
+        counts = rng.multinomial(n, self.weights)
+        return {self.outcomes[i]: int(c) for i, c in enumerate(counts) if c}
+
+
+class CompiledMapEvents:
+    def __init__(self, distribution: OutcomeDistribution, event_names: Dict[int, str]):
+        self.distribution = distribution
+        self.event_names = event_names
+
+
+_cache = TTLCache(maxsize=SAMPLER_CACHE_SIZE, ttl=SAMPLER_TTL_SECONDS)
+
+
+def _compile_map_events(db: Session, map_id: int) -> CompiledMapEvents:
+    event_association = get_event_association_cls()
+    event_cls = get_event_cls()
+    rows = db.execute(
+        select(event_association.event_id, event_association.probability, event_cls.name)
+        .join(event_association.event)
+        .where(event_association.map_id == map_id)
+        .order_by(event_association.event_id)
+    ).all()
+    distribution = OutcomeDistribution([r.event_id for r in rows], [r.probability for r in rows])
+    return CompiledMapEvents(distribution, {r.event_id: r.name for r in rows})
+
+
+def get_map_event_sampler(db: Session, map_id: int) -> CompiledMapEvents:
+    """取得地圖的事件機率分布，未快取時從資料庫編譯一次。"""
+    compiled = _cache.get(map_id)
+    if compiled is None:
+        compiled = _compile_map_events(db, map_id)
+        _cache.set(map_id, compiled)
+    return compiled
+
+
+def invalidate_map_event_sampler(map_id: Optional[int] = None) -> None:
+    """事件關聯變更後呼叫；不帶 map_id 時清除全部快取。"""
+    if map_id is None:
+        _cache.clear()
+    else:
+        _cache.delete(map_id)
+
+
+def sample_map_events(db: Session, map_id: int, n: int, seed: Optional[int] = None) -> List[dict]:
+    """對地圖抽樣 n 次事件，回傳每個事件（含 None = 未觸發）的次數。"""
+    compiled = get_map_event_sampler(db, map_id)
+    counts = compiled.distribution.draw_counts(n, np.random.default_rng(seed))
+    return [
+        {
+            "event_id": event_id,
+            "event_name": compiled.event_names.get(event_id) if event_id is not None else None,
+            "count": count,
+        }
+        for event_id, count in sorted(counts.items(), key=lambda kv: (kv[0] is None, kv[0] or 0))
+    ]
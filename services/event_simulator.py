@@ -0,0 +1,170 @@
+import json
+import operator
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core_system.models import Item, RewardPoolItem
+from core_system.services.event_service import get_event_by_event_id
+
+_OPERATORS: List[Tuple[str, Callable[[Any, Any], bool]]] = [
+    (">=", operator.ge),
+    ("<=", operator.le),
+    ("!=", operator.ne),
+    ("==", operator.eq),
+    (">", operator.gt),
+    ("<", operator.lt),
+]
+
+CompiledCondition = Tuple[str, Callable[[Any, Any], bool], Any]
+
+
+def _as_number(value: Any) -> Any:
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def compile_condition(condition: Dict[str, Any]) -> CompiledCondition:
+    """
+    將單一條件 `{"condition_key": ..., "condition_value": ...}` 編譯為 (key, op, value)。
+
+    condition_value 可帶比較運算子前綴（>=、<=、!=、==、>、<），沒有前綴時視為 ==。
+    能轉為數字的值以數字比較。
+    """
+    raw = str(condition.get("condition_value") or "").strip()
+    op = operator.eq
+    for prefix, fn in _OPERATORS:
+        if raw.startswith(prefix):
+            op, raw = fn, raw[len(prefix):].strip()
+            break
+    return condition.get("condition_key"), op, _as_number(raw)
+
+
+def conditions_pass(conditions: List[CompiledCondition], state: Dict[str, Any]) -> bool:
+    for key, op, expected in conditions:
+        if key not in state:
+            return False
+        actual = _as_number(state[key])
+        try:
+            if not op(actual, expected):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+class CompiledEventResult:
+    def __init__(self, result, conditions: List[CompiledCondition], status_effects: List[Dict[str, Any]]):
+        self.result_id = result.id
+        self.name = result.name
+        self.prior = result.prior or 0
+        self.reward_pool_id = result.reward_pool_id
+        self.conditions = conditions
+        self.status_effects = status_effects
+
+
+def compile_event(db: Session, event_id: int) -> List[CompiledEventResult]:
+    """
+    每個事件只解析一次 condition / status effect JSON，並依 prior 由高到低排序
+    （prior 相同時依 result id）。
+    """
+    event = get_event_by_event_id(db=db, event_id=event_id)
+    if event is None or event.general_logic is None:
+        raise ValueError(f"Event {event_id} not found")
+
+    compiled = [
+        CompiledEventResult(
+            result,
+            [compile_condition(c) for c in (result.get_condition_list() or [])],
+            list(result.get_status_effects_json() or []),
+        )
+        for result in event.general_logic.event_results
+    ]
+    compiled.sort(key=lambda r: (-r.prior, r.result_id))
+    return compiled
+
+
+def select_result(results: List[CompiledEventResult], state: Dict[str, Any]) -> Optional[CompiledEventResult]:
+    for result in results:
+        if conditions_pass(result.conditions, state):
+            return result
+    return None
+
+
+def _state_key(attributes: Dict[str, Any]) -> str:
+    """玩家狀態的正規化 key（屬性順序不影響；值可能是 list / dict 等不可 hash 的型別）。"""
+    return json.dumps(attributes, sort_keys=True, default=repr)
+
+
+def simulate_event(db: Session, event_id: int, players: List[Dict[str, Any]], seed: Optional[int] = None) -> dict:
+    """
+    對一組玩家狀態（每個狀態帶 `count` 次試驗）模擬事件結果。
+
+    條件判定是確定性的，因此每個不同狀態只判定一次，再將次數累加到選中的結果；
+    每個結果的掉落池以 Binomial(次數, p) 一次抽樣，成本與試驗次數無關。
+    """
+    results = compile_event(db, event_id)
+
+    # 相同狀態的玩家先合併次數，每個不同狀態只判定一次
+    states: Dict[str, Tuple[Dict[str, Any], int]] = {}
+    for player in players:
+        key = _state_key(player["attributes"])
+        attributes, count = states.get(key, (player["attributes"], 0))
+        states[key] = (attributes, count + player["count"])
+
+    hits: Dict[Optional[int], int] = {}
+    for attributes, count in states.values():
+        chosen = select_result(results, attributes)
+        key = chosen.result_id if chosen else None
+        hits[key] = hits.get(key, 0) + count
+
+    pool_ids = {r.reward_pool_id for r in results if r.reward_pool_id is not None and hits.get(r.result_id)}
+    pool_rows: Dict[int, list] = {}
+    if pool_ids:
+        rows = db.execute(
+            select(RewardPoolItem.pool_id, RewardPoolItem.item_id, RewardPoolItem.probability, Item.name)
+            .join(Item, Item.id == RewardPoolItem.item_id)
+            .where(RewardPoolItem.pool_id.in_(pool_ids))
+            .order_by(RewardPoolItem.pool_id, RewardPoolItem.item_id)
+        ).all()
+        for row in rows:
+            pool_rows.setdefault(row.pool_id, []).append(row)
+
+    rng = np.random.default_rng(seed)
+    item_counts: Dict[int, dict] = {}
+    status_effect_counts: Dict[str, int] = {}
+    result_out = []
+    for result in results:
+        count = hits.get(result.result_id, 0)
+        result_out.append({"result_id": result.result_id, "name": result.name, "count": count})
+        if not count:
+            continue
+
+        rows = pool_rows.get(result.reward_pool_id, [])
+        if rows:
+            prob = np.clip(np.array([r.probability for r in rows], dtype=np.float64), 0.0, 1.0)
+            for row, drops in zip(rows, rng.binomial(count, prob)):
+                entry = item_counts.setdefault(row.item_id, {"item_id": row.item_id, "item_name": row.name, "count": 0})
+                entry["count"] += int(drops)
+
+        for effect in result.status_effects:
+            key = effect.get("status_effect_key")
+            if key:
+                status_effect_counts[key] = status_effect_counts.get(key, 0) + count
+
+    return {
+        "event_id": event_id,
+        "trials": sum(p["count"] for p in players),
+        "unmatched": hits.get(None, 0),
+        "results": result_out,
+        "items": sorted(item_counts.values(), key=lambda i: i["item_id"]),
+        "status_effects": [
+            {"status_effect_key": k, "count": v} for k, v in sorted(status_effect_counts.items())
+        ],
+    }
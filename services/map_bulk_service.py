@@ -0,0 +1,244 @@
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from core_system.models.maps import Map, MapConnection
+from services.async_query import IN_CHUNK_SIZE
+from services.map_query_service import get_event_association_cls, get_event_cls
+
+
+@dataclass
+class MapEventDiff:
+    """單張地圖的事件關聯變更。"""
+    map_id: int
+    upsert: Dict[int, float] = field(default_factory=dict)  # event_id -> probability
+    remove: Set[int] = field(default_factory=set)
+    normalize: bool = False
+
+
+@dataclass
+class MapEventDiffResult:
+    map_id: int
+    inserted: int = 0
+    updated: int = 0
+    removed: int = 0
+    events: List[dict] = field(default_factory=list)  # event_id / event_name / probability
+
+
+EdgeKey = Tuple[int, int]
+
+
+def edge_key(map_a_id: int, map_b_id: int) -> EdgeKey:
+    """無方向連線的正規化 key：A–B 與 B–A 視為同一條。"""
+    return (map_a_id, map_b_id) if map_a_id <= map_b_id else (map_b_id, map_a_id)
+
+
+@dataclass(frozen=True)
+class EdgeAttrs:
+    is_locked: bool = False
+    required_item: Optional[str] = None
+    required_level: int = 0
+
+
+@dataclass
+class ConnectionEditResult:
+    inserted: int = 0
+    updated: int = 0
+    removed: int = 0
+    connections: Dict[EdgeKey, EdgeAttrs] = field(default_factory=dict)  # 新增 / 更新後的連線
+
+
+def _existing_ids(db: Session, id_column, ids: Iterable[int]) -> Set[int]:
+    """以分段的 IN 查詢找出存在的 id（通常只需一次查詢）。"""
+    ordered = sorted(set(ids))
+    found: Set[int] = set()
+    for start in range(0, len(ordered), IN_CHUNK_SIZE):
+        chunk = ordered[start:start + IN_CHUNK_SIZE]
+        found.update(db.execute(select(id_column).where(id_column.in_(chunk))).scalars())
+    return found
+
+
+def _require_ids(db: Session, id_column, ids: Iterable[int], label: str) -> None:
+    ids = set(ids)
+    missing = sorted(ids - _existing_ids(db, id_column, ids))
+    if missing:
+        raise ValueError(f"{label} not found: {missing}")
+
+
+def _insert_or_update(db: Session, table, key_columns: Sequence[str], update_columns: Sequence[str]):
+    """
+    SQLite / PostgreSQL 以 ON CONFLICT DO UPDATE 寫入，避免同時寫入的請求都判斷「不存在」而違反唯一鍵；
+    其他資料庫退回一般 INSERT。
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(table)
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c[c] for c in key_columns],
+        set_={c: stmt.excluded[c] for c in update_columns},
+    )
+
+
+def apply_map_event_diffs(db: Session, diffs: Sequence[MapEventDiff]) -> List[MapEventDiffResult]:
+    """
+    一次套用多張地圖的事件關聯變更（不 commit）。
+
+    1. 以一次查詢驗證所有地圖、一次查詢驗證所有 upsert 的事件
+    2. 以一次查詢讀出這些地圖目前的關聯，在記憶體中算出最小的 insert / update / delete 集合
+       （機率未變的 upsert、不存在的 remove 都不會產生 SQL）
+    3. 各以一個 executemany 寫入；正規化以一次 GROUP BY 加總，再以一個 executemany UPDATE 在 SQL 中相除
+    4. 以一次查詢讀回所有受影響地圖的最終關聯
+
+    地圖不存在或事件不存在時引發 ValueError（訊息含 "not found"）。
+    """
+    assoc = get_event_association_cls()
+    event_cls = get_event_cls()
+    table = assoc.__table__
+    map_ids = [d.map_id for d in diffs]
+    if not map_ids:
+        return []
+
+    _require_ids(db, Map.id, map_ids, "Maps")
+    _require_ids(db, event_cls.id, (e for d in diffs for e in d.upsert), "Events")
+
+    current: Dict[int, Dict[int, float]] = defaultdict(dict)
+    rows = db.execute(
+        select(assoc.map_id, assoc.event_id, assoc.probability).where(assoc.map_id.in_(map_ids))
+    ).all()
+    for row in rows:
+        current[row.map_id][row.event_id] = row.probability
+
+    results = {d.map_id: MapEventDiffResult(map_id=d.map_id) for d in diffs}
+    inserts: List[dict] = []
+    updates: List[dict] = []
+    deletes: List[dict] = []
+    for diff in diffs:
+        existing = current[diff.map_id]
+        result = results[diff.map_id]
+        for event_id, probability in diff.upsert.items():
+            if event_id not in existing:
+                inserts.append({"map_id": diff.map_id, "event_id": event_id, "probability": probability})
+                result.inserted += 1
+            elif existing[event_id] != probability:
+                updates.append({"b_map_id": diff.map_id, "b_event_id": event_id, "b_probability": probability})
+                result.updated += 1
+        for event_id in diff.remove:
+            if event_id in existing:
+                deletes.append({"b_map_id": diff.map_id, "b_event_id": event_id})
+                result.removed += 1
+
+    if deletes:
+        db.execute(
+            delete(table).where(
+                table.c.map_id == bindparam("b_map_id"), table.c.event_id == bindparam("b_event_id")),
+            deletes,
+        )
+    if updates:
+        db.execute(
+            update(table)
+            .where(table.c.map_id == bindparam("b_map_id"), table.c.event_id == bindparam("b_event_id"))
+            .values(probability=bindparam("b_probability")),
+            updates,
+        )
+    if inserts:
+        db.execute(_insert_or_update(db, table, ("map_id", "event_id"), ("probability",)), inserts)
+
+    normalize_ids = [d.map_id for d in diffs if d.normalize]
+    if normalize_ids:
+        # 先以一次 GROUP BY 取得總和再更新：SQLite 的相關子查詢會讀到同一個 UPDATE 已改過的列。
+        # 機率總和為 0 的地圖維持原狀。
+        totals = db.execute(
+            select(assoc.map_id, func.sum(assoc.probability).label("total"))
+            .where(assoc.map_id.in_(normalize_ids))
+            .group_by(assoc.map_id)
+        ).all()
+        params = [{"b_map_id": t.map_id, "b_total": t.total} for t in totals if t.total and t.total > 0]
+        if params:
+            db.execute(
+                update(table)
+                .where(table.c.map_id == bindparam("b_map_id"))
+                .values(probability=table.c.probability / bindparam("b_total")),
+                params,
+            )
+
+    final = db.execute(
+        select(assoc.map_id, assoc.event_id, event_cls.name, assoc.probability)
+        .join(assoc.event)
+        .where(assoc.map_id.in_(map_ids))
+        .order_by(assoc.map_id, assoc.event_id)
+    ).all()
+    for row in final:
+        results[row.map_id].events.append(
+            {"event_id": row.event_id, "event_name": row.name, "probability": row.probability})
+    return [results[m] for m in map_ids]
+
+
+def apply_map_connection_edits(
+    db: Session,
+    upsert: Dict[EdgeKey, EdgeAttrs],
+    remove: Set[EdgeKey],
+) -> ConnectionEditResult:
+    """
+    一次套用整張地圖圖形的無方向連線變更（不 commit）。key 必須已經過 edge_key 正規化。
+
+    1. 以一次查詢驗證所有出現的地圖
+    2. 以一次查詢讀出兩端都在這些地圖中的既有連線，不論儲存方向都以 edge_key 比對
+    3. 在記憶體中算出最小的 insert / update / delete 集合，各以一個 executemany 寫入
+
+    既有資料中同一對地圖重複的連線會一併更新 / 移除。地圖不存在時引發 ValueError（訊息含 "not found"）。
+    """
+    table = MapConnection.__table__
+    result = ConnectionEditResult(connections=dict(upsert))
+    map_ids = {m for key in (*upsert, *remove) for m in key}
+    if not map_ids:
+        return result
+    _require_ids(db, Map.id, map_ids, "Maps")
+
+    existing: Dict[EdgeKey, List[Tuple[int, EdgeAttrs]]] = defaultdict(list)
+    rows = db.execute(
+        select(
+            MapConnection.id,
+            MapConnection.map_a_id,
+            MapConnection.map_b_id,
+            MapConnection.is_locked,
+            MapConnection.required_item,
+            MapConnection.required_level,
+        ).where(MapConnection.map_a_id.in_(map_ids), MapConnection.map_b_id.in_(map_ids))
+    ).all()
+    for row in rows:
+        attrs = EdgeAttrs(bool(row.is_locked), row.required_item, row.required_level or 0)
+        existing[edge_key(row.map_a_id, row.map_b_id)].append((row.id, attrs))
+
+    inserts: List[dict] = []
+    updates: List[dict] = []
+    deletes: List[dict] = []
+    for key, attrs in upsert.items():
+        current = existing.get(key)
+        if not current:
+            inserts.append({"map_a_id": key[0], "map_b_id": key[1], **asdict(attrs)})
+            result.inserted += 1
+            continue
+        changed = [{"b_id": conn_id, **asdict(attrs)} for conn_id, old in current if old != attrs]
+        updates += changed
+        result.updated += bool(changed)
+    for key in remove:
+        current = existing.get(key)
+        if current:
+            deletes += [{"b_id": conn_id} for conn_id, _ in current]
+            result.removed += 1
+
+    if deletes:
+        db.execute(delete(table).where(table.c.id == bindparam("b_id")), deletes)
+    if updates:
+        db.execute(update(table).where(table.c.id == bindparam("b_id")), updates)
+    if inserts:
+        db.execute(insert(table), inserts)
+    return result
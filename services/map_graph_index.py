@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core_system.models.maps import Map, MapConnection
+
+# 多個 worker 各自持有索引，TTL 用來限制其他 worker 寫入後的過期時間
+INDEX_TTL_SECONDS = float(os.getenv("MAP_GRAPH_INDEX_TTL", "60"))
+
+
+@dataclass(frozen=True)
+class Edge:
+    neighbor_id: int
+    is_locked: bool
+    required_item: Optional[str]
+    required_level: int
+
+    def passable(self, level: int, items: frozenset) -> bool:
+        """
+        未上鎖的連線一律可通行；上鎖的連線必須至少有一個解鎖條件，
+        且玩家滿足所有條件（等級 >= required_level、持有 required_item）。
+        """
+        if not self.is_locked:
+            return True
+        if not self.required_item and not self.required_level:
+            return False
+        if level < self.required_level:
+            return False
+        if self.required_item and self.required_item not in items:
+            return False
+        return True
+
+
+class MapGraphIndex:
+    """地圖連線的記憶體鄰接索引，查詢時不再存取資料庫。"""
+
+    def __init__(self, map_ids: Iterable[int], edges: Iterable[Tuple[int, int, bool, Optional[str], int]]):
+        self.adjacency: Dict[int, List[Edge]] = {map_id: [] for map_id in map_ids}
+        for map_a_id, map_b_id, is_locked, required_item, required_level in edges:
+            self.adjacency[map_a_id].append(
+                Edge(map_b_id, bool(is_locked), required_item, required_level or 0))
+            if map_b_id != map_a_id:
+                self.adjacency[map_b_id].append(
+                    Edge(map_a_id, bool(is_locked), required_item, required_level or 0))
+        self.built_at = time.monotonic()
+
+    def __contains__(self, map_id: int) -> bool:
+        return map_id in self.adjacency
+
+    def reachable(self, start_id: int, level: int = 0, items: Iterable[str] = ()) -> List[int]:
+        """回傳從 start_id 出發可抵達的所有地圖 ID（含自身，依 ID 排序）。"""
+        held = frozenset(items)
+        seen = {start_id}
+        queue = deque([start_id])
+        while queue:
+            current = queue.popleft()
+            for edge in self.adjacency[current]:
+                if edge.neighbor_id not in seen and edge.passable(level, held):
+                    seen.add(edge.neighbor_id)
+                    queue.append(edge.neighbor_id)
+        return sorted(seen)
+
+    def shortest_path(self, start_id: int, goal_id: int, level: int = 0, items: Iterable[str] = ()) -> Optional[List[int]]:
+        """以 BFS 找出最少跳數的路徑，無法抵達時回傳 None。"""
+        held = frozenset(items)
+        parents: Dict[int, Optional[int]] = {start_id: None}
+        queue = deque([start_id])
+        while queue:
+            current = queue.popleft()
+            if current == goal_id:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = parents[current]
+                return path[::-1]
+            for edge in self.adjacency[current]:
+                if edge.neighbor_id not in parents and edge.passable(level, held):
+                    parents[edge.neighbor_id] = current
+                    queue.append(edge.neighbor_id)
+        return None
+
+
+_index: Optional[MapGraphIndex] = None
+_lock = threading.Lock()
+
+
+def _load_index(db: Session) -> MapGraphIndex:
+    map_ids = db.execute(select(Map.id)).scalars().all()
+    edges = db.execute(
+        select(
+            MapConnection.map_a_id,
+            MapConnection.map_b_id,
+            MapConnection.is_locked,
+            MapConnection.required_item,
+            MapConnection.required_level,
+        )
+    ).all()
+    return MapGraphIndex(map_ids, edges)
+
+
+def get_map_graph_index(db: Session) -> MapGraphIndex:
+    """取得目前的鄰接索引；尚未建立或已過期時從資料庫重建一次。"""
+    global _index
+    index = _index
+    if index is not None and time.monotonic() - index.built_at < INDEX_TTL_SECONDS:
+        return index
+    with _lock:
+        index = _index
+        if index is None or time.monotonic() - index.built_at >= INDEX_TTL_SECONDS:
+            index = _load_index(db)
+            _index = index
+    return index
+
+
+def invalidate_map_graph_index() -> None:
+    """地圖或連線變更後呼叫，讓下一次查詢重建索引。"""
+    global _index
+    with _lock:
+        _index = None
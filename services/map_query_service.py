@@ -0,0 +1,137 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from core_system.models.maps import Map, MapConnection
+
+
+def get_event_association_cls():
+    """取得 Map.event_associations 對應的 ORM 類別（core_system 未直接匯出）。"""
+    return Map.event_associations.property.mapper.class_
+
+
+def get_event_cls():
+    """取得 Event ORM 類別（經由 event association 的 relationship）。"""
+    return get_event_association_cls().event.property.mapper.class_
+
+
+def load_map_detail(db: Session, map_id: int) -> Optional[Map]:
+    """
+    以固定次數的查詢載入地圖詳細資料：
+
+    1. 地圖本身
+    2. connections_a + 鄰居 (map_b) 的 id / name
+    3. connections_b + 鄰居 (map_a) 的 id / name
+    4. event_associations + 事件
+
+    不論鄰居或事件數量多少，都只會發出 4 次查詢。
+    """
+    event_association = get_event_association_cls()
+    stmt = (
+        select(Map)
+        .where(Map.id == map_id)
+        .options(
+            selectinload(Map.connections_a)
+            .joinedload(MapConnection.map_b)
+            .load_only(Map.id, Map.name),
+            selectinload(Map.connections_b)
+            .joinedload(MapConnection.map_a)
+            .load_only(Map.id, Map.name),
+            selectinload(Map.event_associations)
+            .joinedload(event_association.event),
+        )
+    )
+    return db.execute(stmt).scalars().first()
+
+
+def build_map_graph(db: Session) -> dict:
+    """
+    以三次批次查詢匯出整個世界的地圖圖形，並預先計算 CSR 格式的鄰接陣列。
+
+    - 所有 index 皆指向 `map_ids` 中的位置，而非地圖 ID。
+    - `adjacency_offsets[i]:adjacency_offsets[i + 1]` 為第 i 張地圖在
+      `adjacency_neighbors` / `adjacency_edges` 中的範圍（雙向）。
+    - `event_offsets` 以相同方式切分 `event_ids` / `event_probabilities`。
+    """
+    event_association = get_event_association_cls()
+    event_cls = get_event_cls()
+
+    map_rows = db.execute(select(Map.id, Map.name).order_by(Map.id)).all()
+    connection_rows = db.execute(
+        select(
+            MapConnection.map_a_id,
+            MapConnection.map_b_id,
+            MapConnection.is_locked,
+            MapConnection.required_item,
+            MapConnection.required_level,
+        ).order_by(MapConnection.map_a_id, MapConnection.map_b_id)
+    ).all()
+    event_rows = db.execute(
+        select(
+            event_association.map_id,
+            event_association.event_id,
+            event_association.probability,
+            event_cls.name,
+        )
+        .join(event_association.event)
+        .order_by(event_association.map_id, event_association.event_id)
+    ).all()
+
+    map_ids = [row.id for row in map_rows]
+    index = {map_id: i for i, map_id in enumerate(map_ids)}
+
+    edge_a, edge_b = [], []
+    edge_is_locked, edge_required_item, edge_required_level = [], [], []
+    buckets = [[] for _ in map_ids]
+    for row in connection_rows:
+        a, b = index[row.map_a_id], index[row.map_b_id]
+        edge = len(edge_a)
+        edge_a.append(a)
+        edge_b.append(b)
+        edge_is_locked.append(bool(row.is_locked))
+        edge_required_item.append(row.required_item)
+        edge_required_level.append(row.required_level or 0)
+        buckets[a].append((b, edge))
+        if b != a:
+            buckets[b].append((a, edge))
+
+    adjacency_offsets = [0]
+    adjacency_neighbors, adjacency_edges = [], []
+    for bucket in buckets:
+        for neighbor, edge in bucket:
+            adjacency_neighbors.append(neighbor)
+            adjacency_edges.append(edge)
+        adjacency_offsets.append(len(adjacency_neighbors))
+
+    event_counts = [0] * len(map_ids)
+    event_ids, event_probabilities = [], []
+    event_names = {}
+    for row in event_rows:
+        event_counts[index[row.map_id]] += 1
+        event_ids.append(row.event_id)
+        event_probabilities.append(row.probability)
+        event_names[row.event_id] = row.name
+
+    event_offsets = [0]
+    for count in event_counts:
+        event_offsets.append(event_offsets[-1] + count)
+
+    catalog_ids = sorted(event_names)
+    return {
+        "map_ids": map_ids,
+        "map_names": [row.name for row in map_rows],
+        "edge_a": edge_a,
+        "edge_b": edge_b,
+        "edge_is_locked": edge_is_locked,
+        "edge_required_item": edge_required_item,
+        "edge_required_level": edge_required_level,
+        "adjacency_offsets": adjacency_offsets,
+        "adjacency_neighbors": adjacency_neighbors,
+        "adjacency_edges": adjacency_edges,
+        "event_offsets": event_offsets,
+        "event_ids": event_ids,
+        "event_probabilities": event_probabilities,
+        "event_catalog_ids": catalog_ids,
+        "event_catalog_names": [event_names[i] for i in catalog_ids],
+    }
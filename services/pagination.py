@@ -0,0 +1,247 @@
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_, select
+
+from services.async_query import AnySession, execute
+
+Key = Tuple[Any, int]
+
+SORT_KEY_LABEL = "_sort_key"
+ID_KEY_LABEL = "_id_key"
+
+
+@dataclass
+class PageRequest:
+    """
+    一次分頁請求。after / before 為 (排序值, id)，兩者最多只能有一個。
+    token 優先於 prev_id / next_id（後者僅適用於 sort=id）。
+    """
+    sort: str = "id"
+    descending: bool = False
+    limit: int = 20
+    after: Optional[Key] = None
+    before: Optional[Key] = None
+
+
+@dataclass
+class Page:
+    rows: List[Any] = field(default_factory=list)
+    has_next: bool = False
+    has_prev: bool = False
+    next_token: Optional[str] = None
+    prev_token: Optional[str] = None
+    sort: str = "id"
+
+    @property
+    def next_id(self) -> Optional[int]:
+        """
+        下一頁的 next_id（僅在有下一頁時）。next_id 只能搭配 sort=id 翻頁，
+        其他排序一律為 None，必須使用 next_token。
+        """
+        if self.sort != "id" or not (self.has_next and self.rows):
+            return None
+        return getattr(self.rows[-1], ID_KEY_LABEL)
+
+    @property
+    def prev_id(self) -> Optional[int]:
+        """上一頁的 prev_id（僅在有上一頁且 sort=id 時，其他排序請使用 prev_token）。"""
+        if self.sort != "id" or not (self.has_prev and self.rows):
+            return None
+        return getattr(self.rows[0], ID_KEY_LABEL)
+
+
+def encode_token(sort: str, descending: bool, direction: str, key: Key) -> str:
+    raw = json.dumps([sort, int(descending), direction, list(key)], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_token(token: str) -> Tuple[str, bool, str, Key]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        sort, descending, direction, key = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ("after", "before") or not isinstance(sort, str):
+            raise ValueError
+        if not isinstance(key, list) or len(key) != 2:
+            raise ValueError
+        value, row_id = key
+        # 排序值必須是純量；與排序欄位型別的比對在 keyset_paginate 中進行
+        if not _is_int(row_id) or isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError
+        return sort, bool(descending), direction, (value, row_id)
+    except (ValueError, TypeError, IndexError, json.JSONDecodeError):
+        raise ValueError("Invalid pagination token")
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_cursor(sort_column, key: Key) -> None:
+    """確認游標的排序值符合排序欄位的型別，避免竄改過的 token 進到 SQL 參數綁定。"""
+    value, row_id = key
+    try:
+        python_type = sort_column.type.python_type
+    except NotImplementedError:
+        return
+    if python_type is int:
+        ok = _is_int(value)
+    elif python_type is float:
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif python_type is str:
+        ok = isinstance(value, str)
+    else:
+        ok = True
+    if not ok or not _is_int(row_id):
+        raise ValueError("Invalid pagination token")
+
+
+def build_page_request(
+    prev_id: Optional[int] = None,
+    next_id: Optional[int] = None,
+    token: Optional[str] = None,
+    sort: str = "id",
+    order: str = "asc",
+    limit: int = 20,
+) -> PageRequest:
+    """將 API 參數轉成 PageRequest；參數衝突時引發 ValueError。"""
+    if sum(v is not None for v in (prev_id, next_id, token)) > 1:
+        raise ValueError("prev_id、next_id 與 token 只能提供其中一個")
+
+    if token is not None:
+        sort, descending, direction, key = decode_token(token)
+        request = PageRequest(sort=sort, descending=descending, limit=limit)
+        setattr(request, direction, key)
+        return request
+
+    request = PageRequest(sort=sort, descending=order == "desc", limit=limit)
+    if prev_id is not None or next_id is not None:
+        if sort != "id":
+            raise ValueError("prev_id / next_id 僅適用於 sort=id，其他排序請使用 token")
+        if prev_id is not None:
+            request.before = (prev_id, prev_id)
+        else:
+            request.after = (next_id, next_id)
+    return request
+
+
+def _past(sort_column, id_column, key: Key, descending: bool):
+    """排序方向上位於 key 之後的條件（以 id 打破平手）。"""
+    value, row_id = key
+    if sort_column is id_column:
+        return id_column < row_id if descending else id_column > row_id
+    if descending:
+        return or_(sort_column < value, and_(sort_column == value, id_column < row_id))
+    return or_(sort_column > value, and_(sort_column == value, id_column > row_id))
+
+
+def _ordering(sort_column, id_column, descending: bool) -> list:
+    columns = [id_column] if sort_column is id_column else [sort_column, id_column]
+    return [c.desc() if descending else c.asc() for c in columns]
+
+
+def _row_key(row) -> Key:
+    return getattr(row, SORT_KEY_LABEL), getattr(row, ID_KEY_LABEL)
+
+
+async def _exists(db: AnySession, id_column, filters: Sequence, condition) -> bool:
+    stmt = select(id_column).where(*filters, condition).limit(1)
+    return (await execute(db, stmt)).first() is not None
+
+
+async def keyset_paginate(
+    db: AnySession,
+    columns: Sequence[Any],
+    id_column,
+    sort_columns: Dict[str, Any],
+    request: PageRequest,
+    filters: Sequence[Any] = (),
+) -> Page:
+    """
+    通用 keyset 分頁：依 sort 欄位與 id 排序，每頁成本與頁碼無關，且不使用 COUNT。
+
+    - 主要方向多取一筆判斷是否還有資料
+    - 另一方向以 LIMIT 1 的存在查詢判斷（第一頁不需查詢）
+    - 回傳的 rows 一律依排序方向排列，並附帶 _sort_key / _id_key 欄位
+
+    sort 不在 sort_columns 中時引發 ValueError。排序欄位應為 NOT NULL。
+    """
+    if request.sort not in sort_columns:
+        raise ValueError(f"Unsupported sort: {request.sort}（可用：{', '.join(sort_columns)}）")
+    sort_column = sort_columns[request.sort]
+    desc = request.descending
+    limit = request.limit
+    for key in (request.before, request.after):
+        if key is not None:
+            _check_cursor(sort_column, key)
+
+    stmt = select(*columns, sort_column.label(SORT_KEY_LABEL), id_column.label(ID_KEY_LABEL)).where(*filters)
+    backward = request.before is not None
+    cursor = request.before if backward else request.after
+    if cursor is not None:
+        stmt = stmt.where(_past(sort_column, id_column, cursor, not desc if backward else desc))
+    stmt = stmt.order_by(*_ordering(sort_column, id_column, not desc if backward else desc)).limit(limit + 1)
+
+    rows = list((await execute(db, stmt)).all())
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
+
+    page = Page(rows=rows, sort=request.sort)
+    if backward:
+        page.has_prev = more
+        anchor = _row_key(rows[-1]) if rows else cursor
+        page.has_next = await _exists(
+            db, id_column, filters,
+            _past(sort_column, id_column, anchor, desc) if rows
+            else or_(_past(sort_column, id_column, anchor, desc), id_column == anchor[1]))
+    else:
+        page.has_next = more
+        if cursor is None:
+            page.has_prev = False
+        else:
+            anchor = _row_key(rows[0]) if rows else cursor
+            page.has_prev = await _exists(
+                db, id_column, filters,
+                _past(sort_column, id_column, anchor, not desc) if rows
+                else or_(_past(sort_column, id_column, anchor, not desc), id_column == anchor[1]))
+
+    if page.has_next:
+        key = _row_key(rows[-1]) if rows else _step(cursor, desc, forward=False)
+        page.next_token = encode_token(request.sort, desc, "after", key)
+    if page.has_prev:
+        key = _row_key(rows[0]) if rows else _step(cursor, desc, forward=True)
+        page.prev_token = encode_token(request.sort, desc, "before", key)
+    return page
+
+
+def _step(key: Key, descending: bool, forward: bool) -> Key:
+    """
+    空白頁時以游標本身產生反方向 token，需讓游標那一列被包含在內：
+    把 id 往外推一格（id 為整數）。
+    """
+    value, row_id = key
+    delta = 1 if forward != descending else -1
+    return value, row_id + delta
+
+
+async def paginate(
+    db: AnySession,
+    columns: Sequence[Any],
+    id_column,
+    sort_columns: Dict[str, Any],
+    *,
+    prev_id: Optional[int] = None,
+    next_id: Optional[int] = None,
+    token: Optional[str] = None,
+    sort: str = "id",
+    order: str = "asc",
+    limit: int = 20,
+    filters: Sequence[Any] = (),
+) -> Page:
+    """列表路由共用入口：解析分頁參數後執行 keyset_paginate，參數錯誤時引發 ValueError。"""
+    request = build_page_request(prev_id=prev_id, next_id=next_id, token=token, sort=sort, order=order, limit=limit)
+    return await keyset_paginate(db, columns, id_column, sort_columns, request, filters)
@@ -0,0 +1,233 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Set
+
+from sqlalchemy import Index, Integer, and_, column, inspect, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from core_system.models import Item
+from core_system.models.monsters import Monster
+from services.map_query_service import get_event_cls
+
+# 已建立 FTS5 虛擬表的資料表名稱；未建立時退回 LIKE 搜尋
+_fts_tables: Set[str] = set()
+
+# trigram 需要 SQLite 3.34+；較舊版本建立失敗時退回 LIKE
+FTS_TOKENIZER = "tokenize='trigram'"
+# trigram 索引無法比對少於 3 個字元的詞，這類查詢改用 LIKE
+FTS_MIN_TERM_LENGTH = 3
+
+
+@dataclass
+class SearchSpec:
+    model: Any
+    text_columns: Sequence[str]
+    index_columns: Sequence[Sequence[str]]
+
+    @property
+    def table(self) -> str:
+        return self.model.__table__.name
+
+    @property
+    def fts_table(self) -> str:
+        return f"{self.table}_fts"
+
+
+def get_search_specs() -> List[SearchSpec]:
+    """
+    各資料表的全文搜尋欄位與 B-tree 索引（最後一欄皆為 id，供 keyset 分頁打破平手）。
+    """
+    event_cls = get_event_cls()
+    return [
+        SearchSpec(Item, ("name", "description"), (
+            ("item_type", "rarity", "price", "id"),
+            ("price", "id"),
+            ("rarity", "id"),
+            ("slot", "id"),
+            ("name", "id"),
+        )),
+        SearchSpec(Monster, ("name",), (
+            ("hp", "id"),
+            ("atk", "id"),
+            ("name", "id"),
+        )),
+        SearchSpec(event_cls, ("name", "description"), (
+            ("type", "id"),
+            ("name", "id"),
+        )),
+    ]
+
+
+def _create_btree_indexes(engine: Engine, spec: SearchSpec) -> None:
+    table = spec.model.__table__
+    for columns in spec.index_columns:
+        name = f"ix_{spec.table}_{'_'.join(columns)}_search"
+        Index(name, *(table.c[c] for c in columns)).create(bind=engine, checkfirst=True)
+
+
+def _create_fts(engine: Engine, spec: SearchSpec) -> None:
+    """
+    建立 external content 的 FTS5 虛擬表與同步用 trigger。
+    使用 trigram tokenizer，中文等不以空白分詞的文字也能以子字串搜尋（行為與 LIKE 一致）。
+    第一次建立時以 rebuild 匯入既有資料，之後由 trigger 維護；
+    舊版以其他 tokenizer 建立的虛擬表會先刪除重建。
+    """
+    fts, table = spec.fts_table, spec.table
+    cols = ", ".join(spec.text_columns)
+    new_cols = ", ".join(f"new.{c}" for c in spec.text_columns)
+    old_cols = ", ".join(f"old.{c}" for c in spec.text_columns)
+    with engine.begin() as conn:
+        existing_sql = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+        ).scalar()
+        if existing_sql is not None and FTS_TOKENIZER not in existing_sql:
+            for suffix in ("ai", "ad", "au"):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {fts}_{suffix}"))
+            conn.execute(text(f"DROP TABLE {fts}"))
+            existing_sql = None
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{cols}, content='{table}', content_rowid='id', {FTS_TOKENIZER})"))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END"))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"))
+        if existing_sql is None:
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def ensure_search_indexes(engine: Engine) -> None:
+    """
+    建立搜尋用的 B-tree 索引；SQLite 另外建立 FTS5 全文索引。
+    資料表不存在（尚未初始化）時略過；FTS5 不可用時退回 LIKE 搜尋。
+    """
+    existing = set(inspect(engine).get_table_names())
+    for spec in get_search_specs():
+        if spec.table not in existing:
+            continue
+        _create_btree_indexes(engine, spec)
+        if engine.url.get_backend_name() != "sqlite":
+            continue
+        try:
+            _create_fts(engine, spec)
+            _fts_tables.add(spec.table)
+        except OperationalError as e:
+            logging.warning(f"FTS5 unavailable for {spec.table}, falling back to LIKE: {e}")
+
+
+def drop_search_indexes(engine: Engine) -> None:
+    """
+    移除搜尋用的 B-tree 索引與 FTS5 虛擬表 / trigger，供大量寫入前使用；
+    寫入完成後再呼叫 ensure_search_indexes 一次重建。
+    """
+    existing = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        for spec in get_search_specs():
+            if spec.table not in existing:
+                continue
+            for columns in spec.index_columns:
+                conn.execute(text(f"DROP INDEX IF EXISTS ix_{spec.table}_{'_'.join(columns)}_search"))
+            if engine.url.get_backend_name() == "sqlite":
+                for suffix in ("ai", "ad", "au"):
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {spec.fts_table}_{suffix}"))
+                conn.execute(text(f"DROP TABLE IF EXISTS {spec.fts_table}"))
+            _fts_tables.discard(spec.table)
+
+
+def _fts_query(terms: List[str]) -> str:
+    """把使用者輸入轉成 FTS5 查詢：每個詞都必須以子字串出現（trigram 不需前綴比對）。"""
+    return " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def _like_pattern(q: str) -> str:
+    return "%" + re.sub(r"([\\%_])", r"\\\1", q) + "%"
+
+
+def text_filter(spec: SearchSpec, q: str):
+    """
+    全文搜尋條件：每個以空白分隔的詞都必須出現在任一文字欄位中（子字串比對、不分大小寫）。
+    有 FTS5 且所有詞都至少 3 個字元時以 rowid 子查詢比對，否則以 LIKE 比對，兩者結果一致。
+    """
+    terms = q.split()
+    if spec.table in _fts_tables and all(len(t) >= FTS_MIN_TERM_LENGTH for t in terms):
+        fts = spec.fts_table
+        subquery = text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :fts_q").bindparams(fts_q=_fts_query(terms))
+        return spec.model.id.in_(subquery.columns(column("rowid", Integer)))
+    return and_(*(
+        or_(*(getattr(spec.model, c).ilike(_like_pattern(t), escape="\\") for c in spec.text_columns))
+        for t in terms
+    ))
+
+
+def _spec_for(model) -> SearchSpec:
+    return next(s for s in get_search_specs() if s.model is model)
+
+
+def _range(col, low: Optional[int], high: Optional[int], name: str) -> list:
+    if low is not None and high is not None and low > high:
+        raise ValueError(f"min_{name} 不可大於 max_{name}")
+    filters = []
+    if low is not None:
+        filters.append(col >= low)
+    if high is not None:
+        filters.append(col <= high)
+    return filters
+
+
+def _text(model, q: Optional[str]) -> list:
+    q = (q or "").strip()
+    return [text_filter(_spec_for(model), q)] if q else []
+
+
+def item_search_filters(
+    q: Optional[str] = None,
+    item_type: Optional[str] = None,
+    slot: Optional[str] = None,
+    min_rarity: Optional[int] = None,
+    max_rarity: Optional[int] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+) -> list:
+    """道具搜尋條件；範圍不合法時引發 ValueError。"""
+    filters = _text(Item, q)
+    if item_type:
+        filters.append(Item.item_type == item_type)
+    if slot:
+        filters.append(Item.slot == slot)
+    filters += _range(Item.rarity, min_rarity, max_rarity, "rarity")
+    filters += _range(Item.price, min_price, max_price, "price")
+    return filters
+
+
+def monster_search_filters(
+    q: Optional[str] = None,
+    drop_pool_id: Optional[int] = None,
+    min_hp: Optional[int] = None,
+    max_hp: Optional[int] = None,
+    min_atk: Optional[int] = None,
+    max_atk: Optional[int] = None,
+) -> list:
+    """怪物搜尋條件；範圍不合法時引發 ValueError。"""
+    filters = _text(Monster, q)
+    if drop_pool_id is not None:
+        filters.append(Monster.drop_pool_id == drop_pool_id)
+    filters += _range(Monster.hp, min_hp, max_hp, "hp")
+    filters += _range(Monster.atk, min_atk, max_atk, "atk")
+    return filters
+
+
+def event_search_filters(q: Optional[str] = None, event_type: Optional[str] = None) -> list:
+    """事件搜尋條件。"""
+    event_cls = get_event_cls()
+    filters = _text(event_cls, q)
+    if event_type:
+        filters.append(event_cls.type == event_type)
+    return filters
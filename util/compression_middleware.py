@@ -0,0 +1,150 @@
+import gzip
+import os
+import zlib
+from typing import Optional
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from util.http_cache import weak_etag
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """依 Accept-Encoding 選擇 br 或 gzip（q=0 視為不接受），都不接受時回傳 None。"""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(token.strip().lower())
+    if "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._gz = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """壓縮一段資料並 flush，讓串流回應的每個 chunk 都能立即送出。"""
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._br.finish()
+        return self._gz.flush(zlib.Z_FINISH)
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0 讓相同內容產生相同位元組，ETag 才會穩定
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    依 Accept-Encoding 以 brotli 或 gzip 壓縮 JSON / NDJSON / 文字回應。
+
+    - 有 Content-Length 且小於 min_size 的回應不壓縮
+    - 有 Content-Length 的回應一次壓縮並更新 Content-Length
+    - 沒有 Content-Length 的串流回應逐 chunk 壓縮
+    - 已帶有強 ETag 的回應壓縮後改為弱 ETag
+    """
+
+    def __init__(self, app: ASGIApp, min_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message = {}
+        mode = "passthrough"
+        body = bytearray()
+        compressor: Optional[_Compressor] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, mode, compressor
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                content_length = headers.get("content-length")
+                if (
+                    message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or (content_length is not None and int(content_length) < self.min_size)
+                ):
+                    mode = "passthrough"
+                    await send(message)
+                    return
+
+                start_message = message
+                out_headers = MutableHeaders(scope=start_message)
+                out_headers["Content-Encoding"] = encoding
+                out_headers.add_vary_header("Accept-Encoding")
+                # 路由自行設定的強 ETag 是以未壓縮內容計算，壓縮後位元組不同，改為弱 ETag
+                if "etag" in out_headers:
+                    out_headers["ETag"] = weak_etag(out_headers["etag"])
+                if content_length is None:
+                    mode = "stream"
+                    compressor = _Compressor(encoding)
+                    await send(start_message)
+                else:
+                    mode = "buffer"
+                return
+
+            if mode == "passthrough" or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunk = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if mode == "stream":
+                data = compressor.compress(chunk) if chunk else b""
+                if not more_body:
+                    data += compressor.finish()
+                if data or not more_body:
+                    await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            body.extend(chunk)
+            if more_body:
+                return
+            compressed = compress_body(bytes(body), encoding)
+            MutableHeaders(scope=start_message)["Content-Length"] = str(len(compressed))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,79 @@
+import logging
+import os
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, URL, make_url
+
+from core_system.models import database
+
+_engine: Optional[Engine] = None
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+def get_database_url() -> URL:
+    """DATABASE_URL 優先，否則沿用 core_system 預設 engine 的 URL。"""
+    return make_url(os.getenv("DATABASE_URL") or database.engine.url)
+
+
+def is_sqlite_memory(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_kwargs(url: URL) -> dict:
+    """
+    由環境變數決定連線池設定：
+    DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT / DB_POOL_RECYCLE / DB_POOL_PRE_PING
+    """
+    kwargs = {
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", "true"),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    }
+    if url.get_backend_name() == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False}
+    # in-memory SQLite 使用 SingletonThreadPool，不支援以下參數
+    if not is_sqlite_memory(url):
+        kwargs["pool_size"] = int(os.getenv("DB_POOL_SIZE", "10"))
+        kwargs["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+        kwargs["pool_timeout"] = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    return kwargs
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        if _env_bool("SQLITE_WAL", "true"):
+            # WAL 讓寫入時不會阻擋其他讀取
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')}")
+        cursor.execute(f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))}")
+        cursor.execute(f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}")
+    finally:
+        cursor.close()
+
+
+def apply_sqlite_pragmas(engine: Engine) -> None:
+    """SQLite 連線建立時設定 WAL / synchronous / busy_timeout / mmap_size。"""
+    if engine.url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+
+
+def get_engine() -> Engine:
+    """
+    依環境變數建立（僅一次）調整過的 engine，並讓 core_system 的 SessionLocal
+    與 database.engine 改用它。
+    """
+    global _engine
+    if _engine is None:
+        url = get_database_url()
+        _engine = create_engine(url, **engine_kwargs(url))
+        apply_sqlite_pragmas(_engine)
+
+        database.engine.dispose()
+        database.engine = _engine
+        database.SessionLocal.configure(bind=_engine)
+        logging.info(f"Database engine configured: {url.render_as_string(hide_password=True)}")
+    return _engine
@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+from typing import Any, Callable, Optional
+
+from util.cache import TTLCache
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_KEY_PREFIX = "bo_cache:"
+
+
+class MemoryBackend:
+    """預設：每個 worker 各自持有的 LRU + TTL 快取。"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value)
+
+    def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        self._cache.delete_where(lambda k, _: k.startswith(prefix))
+
+
+class RedisBackend:
+    """多個 worker 共用的快取，值以 JSON 儲存。需要另外安裝 redis 套件。"""
+
+    def __init__(self, url: str, ttl: float):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._ttl = int(ttl)
+
+    def get(self, key: str) -> Any:
+        raw = self._client.get(CACHE_KEY_PREFIX + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        self._client.set(CACHE_KEY_PREFIX + key, json.dumps(value), ex=self._ttl)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(CACHE_KEY_PREFIX + key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        keys = list(self._client.scan_iter(match=CACHE_KEY_PREFIX + prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+def _create_backend():
+    if CACHE_BACKEND == "redis":
+        logging.info(f"Entity cache uses redis: {CACHE_REDIS_URL}")
+        return RedisBackend(CACHE_REDIS_URL, CACHE_TTL)
+    return MemoryBackend(CACHE_MAX_ENTRIES, CACHE_TTL)
+
+
+backend = _create_backend()
+
+
+def cached_entity(namespace: str, entity_id: int, loader: Callable[[], Optional[dict]]) -> Optional[dict]:
+    """
+    Read-through：命中時直接回傳快取，否則呼叫 loader 並寫入快取。
+    loader 應回傳可 JSON 序列化的 dict；回傳 None（找不到）時不快取。
+    """
+    key = f"{namespace}:{entity_id}"
+    value = backend.get(key)
+    if value is None:
+        value = loader()
+        if value is not None:
+            backend.set(key, value)
+    return value
+
+
+def invalidate_entity(namespace: str, entity_id: int) -> None:
+    backend.delete(f"{namespace}:{entity_id}")
+
+
+def invalidate_namespace(namespace: str) -> None:
+    backend.delete_prefix(f"{namespace}:")
@@ -0,0 +1,77 @@
+import os
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from util.http_cache import etag_for_bytes, etag_matches
+
+# 超過此大小（或沒有 Content-Length 的串流回應）不計算 ETag，直接轉送
+ETAG_MAX_BODY_BYTES = int(os.getenv("ETAG_MAX_BODY_BYTES", str(4 * 1024 * 1024)))
+
+
+class ETagMiddleware:
+    """
+    為 GET / HEAD 的 200 回應加上以內容雜湊計算的強 ETag，
+    並在 If-None-Match 命中時改回 304（不含 body）。
+
+    已自行設定 ETag 的路由（例如 /maps/graph）與串流回應不受影響。
+    """
+
+    def __init__(self, app: ASGIApp, max_body_bytes: int = ETAG_MAX_BODY_BYTES):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start_message: Message = {}
+        body = bytearray()
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_length = headers.get("content-length")
+                if (
+                    message["status"] != 200
+                    or "etag" in headers
+                    or content_length is None
+                    or int(content_length) > self.max_body_bytes
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body.extend(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            etag = etag_for_bytes(bytes(body))
+            headers = MutableHeaders(scope=start_message)
+            headers["ETag"] = etag
+            if "cache-control" not in headers:
+                headers["Cache-Control"] = "no-cache"
+
+            if etag_matches(if_none_match, etag):
+                del headers["content-length"]
+                if "content-type" in headers:
+                    del headers["content-type"]
+                start_message["status"] = 304
+                await send(start_message)
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+            await send(start_message)
+            await send({"type": "http.response.body", "body": bytes(body), "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
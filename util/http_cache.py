@@ -0,0 +1,35 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+
+def compute_etag(payload: Any) -> str:
+    """以 payload 的 canonical JSON 計算強 ETag（含雙引號）。"""
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def weak_etag(etag: str) -> str:
+    """轉成弱 ETag：內容相同但位元組可能不同（例如不同 Content-Encoding）時使用。"""
+    return etag if etag.startswith("W/") else "W/" + etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判斷 If-None-Match 標頭是否命中目前的 ETag（弱比較，忽略 W/ 前綴）。"""
+    if not if_none_match:
+        return False
+    etag = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def etag_for_bytes(body: bytes) -> str:
+    """以回應內容計算強 ETag（含雙引號）。"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
@@ -0,0 +1,86 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+LOGIN_WORKERS = int(os.getenv("LOGIN_WORKERS", "4"))
+# 執行中 + 排隊中的登入上限，超過時直接拒絕而不是無限排隊
+LOGIN_MAX_PENDING = int(os.getenv("LOGIN_MAX_PENDING", "32"))
+# 每個帳號在 LOGIN_USER_WINDOW 秒內最多嘗試 LOGIN_USER_ATTEMPTS 次
+LOGIN_USER_ATTEMPTS = int(os.getenv("LOGIN_USER_ATTEMPTS", "5"))
+LOGIN_USER_WINDOW = float(os.getenv("LOGIN_USER_WINDOW", "10"))
+
+
+class LoginBusyError(Exception):
+    """登入佇列已滿。"""
+
+
+class LoginThrottledError(Exception):
+    """同一帳號嘗試過於頻繁。"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Too many login attempts")
+        self.retry_after = retry_after
+
+
+class LoginPool:
+    """
+    專門執行 bcrypt 驗證等阻塞工作的有界執行緒池，避免登入尖峰卡住 event loop
+    與預設的 AnyIO threadpool。
+    """
+
+    def __init__(self, workers: int, max_pending: int, user_attempts: int, user_window: float):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="login")
+        self._max_pending = max_pending
+        self._user_attempts = user_attempts
+        self._user_window = user_window
+        self._pending = 0
+        self._attempts: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, username: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._pending >= self._max_pending:
+                raise LoginBusyError("Too many pending logins")
+
+            attempts = self._attempts.setdefault(username, deque())
+            while attempts and now - attempts[0] >= self._user_window:
+                attempts.popleft()
+            if len(attempts) >= self._user_attempts:
+                raise LoginThrottledError(self._user_window - (now - attempts[0]))
+
+            attempts.append(now)
+            self._pending += 1
+            # 順便清掉已過期的帳號，避免字典無限成長
+            if len(self._attempts) > 10_000:
+                for key in [k for k, v in self._attempts.items() if not v or now - v[-1] >= self._user_window]:
+                    del self._attempts[key]
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, username: str, fn: Callable[[], T]) -> T:
+        """
+        在登入執行緒池中執行 fn。名額在 executor 的工作真正結束（或排隊中被取消）時才釋放，
+        等待中的請求被取消（例如 client 斷線）時，仍在執行的 bcrypt 也會繼續佔用名額。
+        """
+        self._acquire(username)
+        try:
+            # 帶著目前請求的 contextvars 執行，profiling / metrics 才會記錄到池中執行的 SQL
+            future = self._executor.submit(contextvars.copy_context().run, fn)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+
+login_pool = LoginPool(LOGIN_WORKERS, LOGIN_MAX_PENDING, LOGIN_USER_ATTEMPTS, LOGIN_USER_WINDOW)
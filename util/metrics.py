@@ -0,0 +1,171 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 同一請求中相同 SQL 執行超過此次數即視為疑似 N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+@dataclass
+class RequestStats:
+    """單一請求的 SQL 統計（透過 contextvar 傳遞，threadpool 中的同步路由也會記錄到同一個物件）。"""
+    query_count: int = 0
+    sql_time: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.query_count += 1
+        self.sql_time += elapsed
+        self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def start_request_stats() -> RequestStats:
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    行程內的請求 / SQL 指標彙總，以 Prometheus text format 輸出。
+    多個 worker 時每個行程各自計算。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: Dict[Tuple[str, str], Histogram] = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.query_counts: Dict[Tuple[str, str], Histogram] = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+        self.requests: Counter = Counter()
+        self.sql_seconds: Counter = Counter()
+        self.n_plus_one: Counter = Counter()
+
+    def observe_request(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            self.latency[key].observe(elapsed)
+            self.query_counts[key].observe(stats.query_count)
+            self.requests[(method, route, str(status))] += 1
+            self.sql_seconds[key] += stats.sql_time
+
+        repeated = stats.repeated_statements()
+        if repeated:
+            with self._lock:
+                self.n_plus_one[key] += 1
+            statement, times = repeated[0]
+            logging.warning(f"Possible N+1 on {method} {route}: {times}x {' '.join(statement.split())[:200]}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latency.clear()
+            self.query_counts.clear()
+            self.requests.clear()
+            self.sql_seconds.clear()
+            self.n_plus_one.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            lines += _render_histogram(
+                "http_request_duration_seconds", "Request latency by route.", self.latency)
+            lines += _render_histogram(
+                "db_queries_per_request", "SQL statements executed per request.", self.query_counts)
+            lines += _render_counter(
+                "http_requests_total", "Requests by route and status.",
+                ("method", "route", "status"), self.requests)
+            lines += _render_counter(
+                "db_query_duration_seconds_total", "Total SQL time by route.",
+                ("method", "route"), self.sql_seconds)
+            lines += _render_counter(
+                "db_n_plus_one_suspected_total",
+                f"Requests repeating one statement at least {N_PLUS_ONE_THRESHOLD} times.",
+                ("method", "route"), self.n_plus_one)
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names, values) -> str:
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return ",".join(f'{n}="{v}"' for n, v in zip(names, escaped))
+
+
+def _format_bound(bound) -> str:
+    return str(bound) if isinstance(bound, int) else repr(float(bound))
+
+
+def _render_histogram(name: str, help_text: str, data: Dict[Tuple[str, str], Histogram]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, hist in sorted(data.items()):
+        labels = _labels(("method", "route"), key)
+        cumulative = 0
+        for bound, count in zip(hist.buckets, hist.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{_format_bound(bound)}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+        lines.append(f"{name}_sum{{{labels}}} {hist.sum}")
+        lines.append(f"{name}_count{{{labels}}} {hist.count}")
+    return lines
+
+
+def _render_counter(name: str, help_text: str, label_names, data: Counter) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for key, value in sorted(data.items()):
+        lines.append(f"{name}{{{_labels(label_names, key)}}} {value}")
+    return lines
+
+
+metrics = MetricsRegistry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """為 engine 加上計算 SQL 次數與耗時的事件（async engine 請傳入 sync_engine）。"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,56 @@
+import os
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from util.metrics import MetricsRegistry, metrics, start_request_stats
+
+# 是否在回應加上 Server-Timing header（瀏覽器 DevTools 可直接顯示）
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class ProfilingMiddleware:
+    """
+    記錄每個路由的延遲、SQL 次數與 SQL 耗時，彙總至 util.metrics.metrics。
+
+    以路由樣板（例如 /maps/{map_id}）而非實際路徑分組，避免指標數量隨 ID 成長。
+    應放在最外層，才能涵蓋壓縮與 ETag 的耗時。
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry = metrics, server_timing: bool = SERVER_TIMING_ENABLED):
+        self.app = app
+        self.registry = registry
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = start_request_stats()
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    # 串流回應在此時尚未結束，數值為送出 header 前的耗時
+                    app_ms = (time.perf_counter() - start) * 1000
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        f'app;dur={app_ms:.1f}, db;dur={stats.sql_time * 1000:.1f};desc="{stats.query_count} queries"',
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            self.registry.observe_request(scope["method"], path, status, time.perf_counter() - start, stats)
@@ -0,0 +1,44 @@
+import json
+from typing import Iterable, Iterator, Union
+
+from pydantic import BaseModel
+
+# 累積到此大小才送出一個 chunk，避免每筆資料都觸發一次寫入
+FLUSH_BYTES = 64 * 1024
+
+Streamable = Union[BaseModel, dict]
+
+
+def _dump(obj: Streamable) -> bytes:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump_json().encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def iter_ndjson(objs: Iterable[Streamable]) -> Iterator[bytes]:
+    """將 model / dict 逐筆序列化為 NDJSON（每行一筆）。"""
+    buffer = bytearray()
+    for obj in objs:
+        buffer += _dump(obj)
+        buffer += b"\n"
+        if len(buffer) >= FLUSH_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def iter_json_array(objs: Iterable[Streamable]) -> Iterator[bytes]:
+    """將 model / dict 逐筆序列化為 JSON array，輸出與一次回傳整個 list 相同。"""
+    buffer = bytearray(b"[")
+    first = True
+    for obj in objs:
+        if not first:
+            buffer += b","
+        first = False
+        buffer += _dump(obj)
+        if len(buffer) >= FLUSH_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]"
+    yield bytes(buffer)